@@ -0,0 +1,197 @@
+"""
+Batch query mode for degrees.
+
+Reads one JSON query per line, such as
+
+    {"source": "Kevin Bacon", "target": "129"}
+
+where each person is given by person_id or by name, and writes one JSON
+result per line. A query may add "years": [start, end] to only connect
+people through movies released in that range (either bound may be null).
+The graph is loaded once, and the paths of repeated pairs come from an LRU
+cache.
+
+A line such as {"update": {"stars": "new_stars.csv"}} adds the rows of delta
+CSV files (keys people, movies and stars) to the loaded graph instead.
+"""
+
+import json
+import sys
+import time
+
+from cache import LRUCache
+from engines import search
+from filters import year_view
+from nameindex import name_index
+from updates import apply_update
+
+
+# Marks a cache miss, since None is a cached "not connected" answer
+MISSING = object()
+
+
+class QueryError(Exception):
+    """
+    Raised when a query cannot be answered, e.g. an unknown person.
+    `candidates` lists the people the query may have meant.
+    """
+
+    def __init__(self, message, candidates=None):
+        super().__init__(message)
+        self.candidates = candidates
+
+
+def resolve(graph, person):
+    """
+    Returns the index of a person given by person_id or by name.
+    """
+    person = str(person)
+    i = graph.person_index(person)
+    if i is not None:
+        return i
+    matches = graph.people_named(person)
+    if len(matches) == 1:
+        return matches[0]
+    candidates = name_index(graph).resolve(person)
+    if not matches:
+        raise QueryError(f"person not found: {person}", candidates)
+    raise QueryError(f"ambiguous name: {person}", candidates)
+
+
+class BatchServer():
+    """
+    Answers shortest-path queries on a loaded graph, caching their paths.
+    """
+
+    def __init__(self, graph, mode="bidirectional", cache_size=100000, years=None):
+        self.graph = graph
+        self.mode = mode
+        self.years = years
+        self.cache = LRUCache(cache_size)
+        self.queries = 0
+
+    def path(self, source, target, years=None):
+        """
+        Returns the (movie, person) index path between two people, or None.
+        Paths limited to a range of years are searched on the cached view
+        of that range rather than kept in the path cache.
+        """
+        if years is not None:
+            return search(year_view(self.graph, *years), source, target, self.mode)
+        key = (source, target)
+        path = self.cache.get(key, MISSING)
+        if path is not MISSING:
+            return path
+        path = search(self.graph, source, target, self.mode)
+        self.cache.put(key, path)
+        # A path read backwards is a shortest path for the reversed query
+        if path is not None:
+            self.cache.put((target, source), reverse_path(source, path))
+        else:
+            self.cache.put((target, source), None)
+        return path
+
+    def answer(self, query):
+        """
+        Returns the JSON-serializable result of a query dictionary.
+        """
+        self.queries += 1
+        result = {"source": query.get("source"), "target": query.get("target")}
+        try:
+            if "source" not in query or "target" not in query:
+                raise QueryError("query needs a source and a target")
+            source = resolve(self.graph, query["source"])
+            target = resolve(self.graph, query["target"])
+            years = query.get("years", self.years)
+            if years is not None:
+                if (
+                    not isinstance(years, (list, tuple)) or len(years) != 2
+                    or not all(year is None or isinstance(year, int) for year in years)
+                ):
+                    raise QueryError("years must be [start, end]")
+                years = tuple(years)
+        except QueryError as e:
+            result["error"] = str(e)
+            if e.candidates:
+                result["candidates"] = e.candidates
+            return result
+
+        path = self.path(source, target, years)
+        if path is None:
+            result["degrees"] = None
+            result["path"] = None
+        else:
+            result["degrees"] = len(path)
+            result["path"] = [
+                {"movie_id": self.graph.movie_ids[movie], "person_id": self.graph.person_ids[person]}
+                for movie, person in path
+            ]
+        return result
+
+    def update(self, files):
+        """
+        Applies delta CSV files given as {"people": ..., "movies": ...,
+        "stars": ...} to the graph, dropping the cached paths they affect.
+        """
+        try:
+            if not isinstance(files, dict) or not set(files) <= {"people", "movies", "stars"}:
+                raise ValueError("update takes people, movies and stars files")
+            return {"update": apply_update(self.graph, caches=[self.cache], **files)}
+        except (OSError, KeyError, ValueError) as e:
+            return {"error": f"update failed: {e}"}
+
+    def serve(self, lines, output):
+        """
+        Answers every JSON line of an iterable, writing one JSON result per
+        line to `output` as soon as it is known.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                query = json.loads(line)
+                if not isinstance(query, dict):
+                    raise ValueError("query must be a JSON object")
+            except ValueError as e:
+                self.queries += 1
+                result = {"error": f"invalid query: {e}"}
+            else:
+                if "update" in query:
+                    result = self.update(query["update"])
+                else:
+                    result = self.answer(query)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the last person of `path` back to `source`.
+    """
+    people = [source] + [person for _, person in path]
+    return [(path[i][0], people[i]) for i in reversed(range(len(path)))]
+
+
+def run(graph, filename="-", mode="bidirectional", output=sys.stdout, years=None):
+    """
+    Answers the queries of a JSONL file ("-" for stdin) and reports the
+    throughput on stderr. `years` is the default range of queries without
+    one.
+    """
+    server = BatchServer(graph, mode, years=years)
+    start = time.perf_counter()
+    if filename == "-":
+        server.serve(sys.stdin, output)
+    else:
+        with open(filename, encoding="utf-8") as f:
+            server.serve(f, output)
+    elapsed = time.perf_counter() - start
+
+    rate = server.queries / elapsed if elapsed else 0.0
+    print(
+        f"{server.queries} queries in {elapsed:.3f}s ({rate:.1f} queries/s), "
+        f"{server.cache.hits} cache hits",
+        file=sys.stderr
+    )
+    return server
@@ -0,0 +1,153 @@
+"""
+Benchmark suite for degrees.
+
+For a dataset directory, records the time and peak memory of loading the
+graph (from the CSV files and from its snapshot) and the latency
+percentiles of every search mode over the same random pairs of people.
+
+Usage: python benchmark.py [directory] [queries] [--modes MODE ...] [--json FILE]
+
+A dataset of any size can be made with generate.py, e.g.
+    python generate.py large 1000000
+    python benchmark.py large
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from engines import MODES, search
+from graph import Graph
+from snapshot import load_graph, snapshot_path
+
+
+# Largest number of people on which slow modes run unless asked for
+SLOW_MODES = {"bfs": 10000}
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of a call.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(function, *args, **kwargs):
+    """
+    Returns the peak number of bytes allocated during a call.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """
+    Returns the given percentiles and the maximum of a list of samples.
+    """
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        i = min(len(ordered) - 1, round(point / 100 * (len(ordered) - 1)))
+        result[f"p{point}"] = ordered[i]
+    result["max"] = ordered[-1]
+    return result
+
+
+def benchmark_loading(directory):
+    """
+    Times loading a directory from its CSV files and from its snapshot, and
+    measures the peak memory of loading from the CSV files.
+    """
+    if os.path.exists(snapshot_path(directory)):
+        os.remove(snapshot_path(directory))
+    graph, csv_time = timed(Graph.from_csv, directory)
+    _, save_time = timed(load_graph, directory)
+    _, snapshot_time = timed(load_graph, directory)
+    return graph, {
+        "people": graph.person_count,
+        "movies": graph.movie_count,
+        "credits": len(graph.person_movies),
+        "csv_load_seconds": csv_time,
+        "csv_load_and_snapshot_seconds": save_time,
+        "snapshot_load_seconds": snapshot_time,
+        "csv_load_peak_bytes": peak_memory(Graph.from_csv, directory),
+        "graph_table_bytes": graph.nbytes()
+    }
+
+
+def benchmark_queries(graph, queries=200, seed=0, modes=None):
+    """
+    Returns the latency percentiles, in milliseconds, of each search mode
+    over the same random pairs of people. By default every mode runs, except
+    slow modes on graphs too large for them.
+    """
+    if modes is None:
+        modes = [
+            mode for mode in MODES
+            if graph.person_count <= SLOW_MODES.get(mode, graph.person_count)
+        ]
+    rng = random.Random(seed)
+    pairs = [
+        (rng.randrange(graph.person_count), rng.randrange(graph.person_count))
+        for _ in range(queries)
+    ]
+
+    results = {}
+    for mode in modes:
+        # Build indexes the mode relies on outside of the timings
+        if pairs:
+            search(graph, pairs[0][0], pairs[0][1], mode)
+        latencies = []
+        connected = 0
+        for source, target in pairs:
+            path, seconds = timed(search, graph, source, target, mode)
+            latencies.append(seconds * 1000)
+            connected += path is not None
+        results[mode] = {
+            "queries": len(latencies),
+            "connected": connected,
+            **percentiles(latencies)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading and searching a degrees dataset.")
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("queries", nargs="?", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", choices=MODES, help="search modes to benchmark")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args()
+
+    graph, loading = benchmark_loading(args.directory)
+    print(f"{loading['people']} people, {loading['movies']} movies, {loading['credits']} credits")
+    print(f"CSV load:      {loading['csv_load_seconds']:.3f}s "
+          f"(peak {loading['csv_load_peak_bytes'] / 2 ** 20:.1f} MiB)")
+    print(f"Snapshot load: {loading['snapshot_load_seconds'] * 1000:.2f}ms")
+    print(f"Graph tables:  {loading['graph_table_bytes'] / 2 ** 20:.1f} MiB")
+
+    queries = benchmark_queries(graph, args.queries, args.seed, args.modes)
+    print()
+    print(f"{'mode':<14}{'queries':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode, stats in queries.items():
+        print(f"{mode:<14}{stats['queries']:>8}{stats['p50']:>10.2f}{stats['p90']:>10.2f}"
+              f"{stats['p99']:>10.2f}{stats['max']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"directory": args.directory, "loading": loading, "queries": queries}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Least-recently-used cache for search results.
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache():
+    """
+    Mapping of keys to values holding at most `capacity` entries, evicting
+    the least recently used entry first.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """
+        Returns the value of a key and marks it as recently used.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def discard_if(self, predicate):
+        """
+        Removes every entry for which predicate(key, value) is true, and
+        returns the number of entries removed.
+        """
+        stale = [key for key, value in self.entries.items() if predicate(key, value)]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,127 @@
+"""
+Connected components of the degrees graph.
+
+A single pass labels every person with the component it belongs to, so
+whether two people are connected at all is answered in O(1), before any
+search explores the whole component of the source.
+"""
+
+from array import array
+from collections import Counter
+
+
+class ComponentIndex():
+    """
+    Component label of every person and size of every component.
+    """
+
+    def __init__(self, labels, sizes):
+        self.labels = labels
+        self.sizes = sizes
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Labels components with a breadth-first search from each unlabeled
+        person, expanding every movie once.
+        """
+        labels = array("i", [-1]) * graph.person_count
+        sizes = array("i")
+        seen_movies = bytearray(graph.movie_count)
+        for root in range(graph.person_count):
+            if labels[root] != -1:
+                continue
+            label = len(sizes)
+            labels[root] = label
+            size = 1
+            layer = [root]
+            while layer:
+                next_layer = []
+                for person in layer:
+                    for movie in graph.movies_of(person):
+                        if seen_movies[movie]:
+                            continue
+                        seen_movies[movie] = 1
+                        for star in graph.stars_of(movie):
+                            if labels[star] == -1:
+                                labels[star] = label
+                                next_layer.append(star)
+                size += len(next_layer)
+                layer = next_layer
+            sizes.append(size)
+        return cls(labels, sizes)
+
+    def update(self, graph, people, credits):
+        """
+        Updates the labels after `people` and (person, movie) `credits` were
+        added to the graph: new people start alone, and components joined by
+        a credit are merged by relabeling the smaller one.
+        """
+        while len(self.labels) < graph.person_count:
+            self.labels.append(len(self.sizes))
+            self.sizes.append(1)
+        for person, movie in credits:
+            for star in graph.stars_of(movie):
+                self.merge(graph, person, star)
+
+    def merge(self, graph, a, b):
+        """
+        Merges the components of two people who are now connected.
+        """
+        keep, drop = self.labels[a], self.labels[b]
+        if keep == drop:
+            return
+        if self.sizes[keep] < self.sizes[drop]:
+            keep, drop = drop, keep
+            a, b = b, a
+
+        # The dropped component is still connected by its own credits, so a
+        # search limited to its labels reaches all of its people
+        self.labels[b] = keep
+        layer = [b]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for movie in graph.movies_of(person):
+                    for star in graph.stars_of(movie):
+                        if self.labels[star] == drop:
+                            self.labels[star] = keep
+                            next_layer.append(star)
+            layer = next_layer
+        self.sizes[keep] += self.sizes[drop]
+        self.sizes[drop] = 0
+
+    def connected(self, a, b):
+        return self.labels[a] == self.labels[b]
+
+    def size_of(self, person):
+        """
+        Returns the number of people in the component of a person.
+        """
+        return self.sizes[self.labels[person]]
+
+    def stats(self, top=10):
+        """
+        Returns a summary of the components: how many there are, how many
+        people are isolated, and the sizes of the `top` largest ones.
+        """
+        # Components merged into others by updates are left with size 0
+        sizes = [size for size in self.sizes if size]
+        histogram = Counter(sizes)
+        return {
+            "components": len(sizes),
+            "people": len(self.labels),
+            "isolated": histogram.get(1, 0),
+            "largest": sorted(sizes, reverse=True)[:top],
+            "size_histogram": dict(sorted(histogram.items()))
+        }
+
+
+def component_index(graph):
+    """
+    Returns the component index of a graph, building it on first use.
+    """
+    index = graph.indexes.get("components")
+    if index is None:
+        index = graph.indexes["components"] = ComponentIndex.build(graph)
+    return index
@@ -1,66 +1,90 @@
-import csv
+import argparse
+import itertools
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import batch
+import engines
+import parallel
+from components import component_index
+from engines import MODES
+from filters import year_view
+from graph import Graph
+from landmarks import DEFAULT_LANDMARKS, LandmarkIndex, landmark_index
+from nameindex import name_index
+from snapshot import load_graph
+from updates import apply_update
+
+# Cast graph holding people and movies as integer-indexed CSR tables
+graph = Graph()
 
 # Maps names to a set of corresponding person_ids
-names = {}
+names = graph.names
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+people = graph.people
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+movies = graph.movies
+
+# Compacted copy of the graph shared with worker pools after an update,
+# built on first use and dropped by the next update
+compacted = None
 
 
-def load_data(directory):
+def load_data(directory, snapshot=True, workers=None, components=False):
     """
     Load data from CSV files into memory.
+
+    With `snapshot` set, the graph is memory-mapped from the binary snapshot
+    of the directory when it is up to date with the CSV files, and the
+    snapshot is written after parsing them otherwise. Large CSV files are
+    parsed in chunks by a pool of `workers` processes. With `components`
+    set, connected components are labeled so that searches between people
+    who are not connected return immediately.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global graph, names, people, movies, compacted
+
+    graph = load_graph(directory, snapshot=snapshot, workers=workers)
+    compacted = None
+    if components:
+        component_index(graph)
+
+    # Read-only views keeping the original dictionary interface
+    names = graph.names
+    people = graph.people
+    movies = graph.movies
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+    parser = argparse.ArgumentParser(description="Degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--mode", choices=MODES, default="bidirectional",
+                        help="search engine used by shortest_path")
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                        help="answer JSONL queries from FILE (stdin if omitted), one JSON result per line")
+    parser.add_argument("--components", action="store_true",
+                        help="label connected components so unconnected people are answered at once")
+    parser.add_argument("--years", metavar=("START", "END"), type=int, nargs=2,
+                        help="only connect people through movies released from START to END")
+    parser.add_argument("--landmarks", metavar="N", type=int,
+                        help="precompute a landmark distance index from the N highest-degree people")
+    args = parser.parse_args()
+
+    # In batch mode stdout only carries results
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(args.directory, components=args.components)
+    print("Data loaded.", file=log)
+
+    if args.landmarks:
+        build_landmarks(args.landmarks)
+        print(f"Landmark index built from {args.landmarks} people.", file=log)
+
+    if args.batch:
+        batch.run(graph, args.batch, mode=args.mode, years=args.years)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +93,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, mode=args.mode, years=args.years)
 
     if path is None:
         print("Not connected.")
@@ -84,49 +108,155 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def update_data(people=None, movies=None, stars=None):
+    """
+    Adds the rows of delta CSV files, with the same headers as people.csv,
+    movies.csv and stars.csv, to the loaded data without reloading it.
+    Returns a summary of the rows added and skipped.
+    """
+    global compacted
+    compacted = None
+    return apply_update(graph, people=people, movies=movies, stars=stars)
+
+
+def shortest_path(source, target, mode="bidirectional", years=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `mode` selects the search engine (see engines.MODES):
+    "bfs" for a single breadth-first search from the source,
+    "bidirectional" to search from both ends until they meet,
+    "landmark" for an A* search pruned by the landmark index.
+
+    `years` limits the search to movies released within a (start, end)
+    range of years, both included, where either may be None.
+
     If no possible path, returns None.
     """
-    # nodes will contain node.state() as a person_id and the action is the film to get to the next person.
+    source, target = graph.person_index(source), graph.person_index(target)
+    if source is None or target is None:
+        return None
 
-    # path will return each explored node as a list of tuple (node.action, node.state)
-    path = []
+    searched = graph if years is None else year_view(graph, *years)
+    path = engines.search(searched, source, target, mode)
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
 
-    # initialize a set to keep track of explored node to avoid loopping
-    explored_nodes = set()
 
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
+def all_shortest_paths(source, target, limit=None):
+    """
+    Yields the shortest lists of (movie_id, person_id) pairs connecting the
+    source to the target, one at a time, stopping after `limit` paths if
+    given. Yields nothing if they are not connected.
+    """
+    source, target = graph.person_index(source), graph.person_index(target)
+    if source is None or target is None:
+        return
+    paths = engines.all_shortest_paths(graph, source, target)
+    for path in itertools.islice(paths, limit):
+        yield [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
 
-    # starting the search algorithm
-    while True:
-        # if frontier empty: no more path possible, solution impossible
-        if frontier.empty():
-            return None
 
-        node = frontier.remove()
+def shortest_paths(pairs, mode="bidirectional", workers=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs, or None, for
+    each (source, target) pair of person_ids, in order.
 
-        # if the node correspond to the goal "target", we have found a solution and we can retrieve all actions and nodes from the path
-        if node.state == target:
-            while node.parent:
-                # insert at the beginning of the list each new node.action (film) and node.state(person_id)
-                path.insert(0, (node.action, node.state))
-                node = node.parent
-            return path
+    The queries are answered by a pool of `workers` processes sharing the
+    graph in memory. Sources asked for many targets are answered from a
+    single breadth-first search tree. After an update, the pool shares a
+    compacted copy of the graph, which keeps every person and movie index.
+    It is built once and reused until the next update.
+    """
+    global compacted
+    indexes = [(graph.person_index(source), graph.person_index(target)) for source, target in pairs]
+    known = [pair for pair in indexes if None not in pair]
+    shared = graph
+    if workers != 1 and graph.updated:
+        if compacted is None:
+            compacted = graph.compact()
+        shared = compacted
+    found = iter(parallel.shortest_paths(shared, known, mode, workers))
 
-        # add frontier-removed's node into the explored set
-        explored_nodes.add(node.state)
+    paths = []
+    for pair in indexes:
+        path = next(found) if None not in pair else None
+        if path is not None:
+            path = [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+        paths.append(path)
+    return paths
 
-        # add neighbor to the frontier:
-        for action, state in neighbors_for_person(node.state):
-            if state not in explored_nodes and not frontier.contains_state(state):
-                child = Node(state=state, parent=node, action=action)
-                frontier.add(child)
+
+def paths_from(source, targets=None):
+    """
+    Returns a dictionary mapping each target person_id (everyone if not
+    given) to its shortest list of (movie_id, person_id) pairs from the
+    source, or None, from a single breadth-first search.
+    """
+    source = graph.person_index(source)
+    if targets is None:
+        targets = graph.person_ids
+    if source is None:
+        return {target: None for target in targets}
+
+    tree = engines.shortest_path_tree(graph, source)
+    paths = {}
+    for target in targets:
+        target_index = graph.person_index(target)
+        path = None if target_index is None else engines.tree_path(tree, source, target_index)
+        if path is not None:
+            path = [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+        paths[target] = path
+    return paths
+
+
+def component_of(person_id):
+    """
+    Returns (component label, component size) for a person_id, labeling the
+    components first if load_data did not.
+    """
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    index = component_index(graph)
+    return index.labels[person], index.size_of(person)
+
+
+def component_stats(top=10):
+    """
+    Returns the number of connected components, the number of isolated
+    people and the sizes of the `top` largest components.
+    """
+    return component_index(graph).stats(top)
+
+
+def build_landmarks(count=DEFAULT_LANDMARKS, person_ids=None):
+    """
+    Precomputes the distances from landmark people to everyone, using the
+    given person_ids as landmarks or the `count` highest-degree people.
+    """
+    landmarks = None
+    if person_ids is not None:
+        landmarks = [graph.person_index(person_id) for person_id in person_ids]
+        if None in landmarks:
+            raise KeyError("unknown landmark person_id")
+    graph.indexes["landmarks"] = LandmarkIndex.build(graph, count, landmarks)
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    person_ids from the landmark index, without searching.
+
+    The upper bound is math.inf when no landmark reaches them, and both are
+    math.inf when they are known not to be connected.
+    """
+    source, target = graph.person_index(source), graph.person_index(target)
+    if source is None or target is None:
+        raise KeyError("unknown person_id")
+    return landmark_index(graph).bounds(source, target)
 
 
 def person_id_for_name(name):
@@ -155,17 +285,27 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def resolve_name(name, limit=10):
+    """
+    Returns up to `limit` ranked candidates for a name without prompting:
+    exact matches, then names starting with it, then similar names.
+    Each candidate is a dictionary of: person_id, name, birth, match, score.
+    """
+    return name_index(graph).resolve(name, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return {
+        (graph.movie_ids[movie], graph.person_ids[star])
+        for movie, star in graph.neighbors(person)
+    }
 
 
 if __name__ == "__main__":
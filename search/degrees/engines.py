@@ -0,0 +1,385 @@
+"""
+Search engines running on the integer Graph of graph.py.
+
+Every engine takes a graph and two person indexes and returns the shortest
+list of (movie, person) index pairs connecting them, or None if they are
+not connected. `search` runs the engine of a mode after checking the
+component index of the graph, if it has one.
+"""
+
+import math
+from array import array
+from collections import deque
+
+from landmarks import landmark_index
+from util import Node, QueueFrontier
+
+
+# Smallest layer the landmark search checks against its bounds: smaller
+# layers cost less to expand than to check
+PRUNE_LAYER = 64
+
+
+def breadth_first(graph, source, target):
+    """
+    Breadth-first search from source to target with a QueueFrontier.
+    """
+    # initialize a set to keep track of explored node to avoid loopping
+    explored_nodes = set()
+
+    start = Node(state=source, parent=None, action=None)
+    frontier = QueueFrontier()
+    frontier.add(start)
+
+    while True:
+        # if frontier empty: no more path possible, solution impossible
+        if frontier.empty():
+            return None
+
+        node = frontier.remove()
+
+        # goal reached: retrieve all actions and states from the path
+        if node.state == target:
+            path = []
+            while node.parent:
+                path.append((node.action, node.state))
+                node = node.parent
+            path.reverse()
+            return path
+
+        explored_nodes.add(node.state)
+
+        for action, state in graph.neighbors(node.state):
+            if state not in explored_nodes and not frontier.contains_state(state):
+                child = Node(state=state, parent=node, action=action)
+                frontier.add(child)
+
+
+def bidirectional(graph, source, target, prune=None):
+    """
+    Breadth-first search growing from both source and target, one layer at a
+    time from the smaller frontier, until the two searches meet.
+
+    `prune(layer, depth, goal)` may return the people of a layer at `depth`
+    from one end that can lie on a shortest path to the `goal` at the other
+    end, to expand only those.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to (movie, person one step closer to the root)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = deque([source])
+    backward_frontier = deque([target])
+    forward_depth = backward_depth = 0
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            if prune is not None:
+                forward_frontier = prune(forward_frontier, forward_depth, target)
+            forward_depth += 1
+            meeting = expand_layer(graph, forward_frontier, forward, backward)
+        else:
+            if prune is not None:
+                backward_frontier = prune(backward_frontier, backward_depth, source)
+            backward_depth += 1
+            meeting = expand_layer(graph, backward_frontier, backward, forward)
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+    return None
+
+
+def landmark(graph, source, target):
+    """
+    Bidirectional search pruned by the landmark index of the graph.
+
+    Before a layer at depth d from one end is expanded, the people whose
+    landmark lower bound to the other end exceeds the upper bound minus d
+    are dropped from it, as they cannot lie on a shortest path. A layer is
+    only checked when it is large and when the bounds can drop anyone at
+    its depth at all. Pairs the index proves disconnected are answered
+    without searching.
+    """
+    index = landmark_index(graph)
+    lower, upper = index.bounds(source, target)
+    if lower == math.inf:
+        return None
+    if upper == math.inf:
+        return bidirectional(graph, source, target)
+    goals = {source: index.reach(source), target: index.reach(target)}
+
+    def prune(layer, depth, goal):
+        landmarks, farthest = goals[goal]
+        if len(layer) < PRUNE_LAYER or depth + farthest <= upper:
+            return layer
+        slack = upper - depth
+        kept = deque()
+        for person in layer:
+            for distances, distance in landmarks:
+                if abs(distances[person] - distance) > slack:
+                    break
+            else:
+                kept.append(person)
+        return kept
+
+    return bidirectional(graph, source, target, prune)
+
+
+def expand_layer(graph, frontier, parents, other_parents):
+    """
+    Expands every person of the current layer of a frontier.
+
+    Returns the first person reached by both searches, or None. Meetings are
+    detected as soon as a person is reached, so the first one found lies on
+    a shortest path.
+    """
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    for _ in range(len(frontier)):
+        person = frontier.popleft()
+        for movie in movies_of(person):
+            for star in stars_of(movie):
+                if star in parents:
+                    continue
+                parents[star] = (movie, person)
+                if star in other_parents:
+                    return star
+                frontier.append(star)
+    return None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Builds the (movie, person) path through the meeting person from the
+    parent maps of a bidirectional search.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, child = backward[person]
+        path.append((movie, child))
+        person = child
+    return path
+
+
+def bipartite(graph, source, target):
+    """
+    Bidirectional search on the bipartite graph of people and movies.
+
+    Each movie is expanded at most once per side of the search, and a
+    reached person only records the movie it was reached through, while a
+    movie records the person who expanded it, so no (movie, person) pairs
+    are built. It returns the same paths as the bidirectional mode.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the movie it was reached through, and each
+    # expanded movie to the person it was expanded from
+    forward_people, forward_movies = {source: None}, {}
+    backward_people, backward_movies = {target: None}, {}
+    forward_layer, backward_layer = [source], [target]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_movies(
+                graph, forward_layer, forward_people, forward_movies, backward_people
+            )
+        else:
+            backward_layer, meeting = expand_movies(
+                graph, backward_layer, backward_people, backward_movies, forward_people
+            )
+        if meeting is not None:
+            path = []
+            person = meeting
+            while forward_people[person] is not None:
+                movie = forward_people[person]
+                path.append((movie, person))
+                person = forward_movies[movie]
+            path.reverse()
+
+            person = meeting
+            while backward_people[person] is not None:
+                movie = backward_people[person]
+                person = backward_movies[movie]
+                path.append((movie, person))
+            return path
+    return None
+
+
+def expand_movies(graph, layer, people, movies, other_people):
+    """
+    Expands the movies of a layer of people that this side of the search
+    has not expanded yet, and returns (next layer, meeting person or None).
+    """
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    next_layer = []
+    for person in layer:
+        for movie in movies_of(person):
+            if movie in movies:
+                continue
+            movies[movie] = person
+            for star in stars_of(movie):
+                if star in people:
+                    continue
+                people[star] = movie
+                if star in other_people:
+                    return next_layer, star
+                next_layer.append(star)
+    return next_layer, None
+
+
+def shortest_path_predecessors(graph, source, target):
+    """
+    Returns the DAG of every shortest path from source to target, as a map of
+    each person on such a path to its (movie, previous person) pairs, or None
+    if they are not connected.
+
+    A breadth-first pass labels people with their distance from the source
+    until the target is reached, then a backward pass from the target keeps
+    only the people one step closer to the source.
+    """
+    distances = {source: 0}
+    seen_movies = set()
+    layer = [source]
+    depth = 0
+    while layer and target not in distances:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if movie in seen_movies:
+                    continue
+                seen_movies.add(movie)
+                for star in graph.stars_of(movie):
+                    if star not in distances:
+                        distances[star] = depth
+                        next_layer.append(star)
+        layer = next_layer
+    if target not in distances:
+        return None
+
+    predecessors = {source: []}
+    layer = [target]
+    while depth > 0:
+        previous_layer = set()
+        for person in layer:
+            steps = predecessors[person] = []
+            for movie in graph.movies_of(person):
+                for star in graph.stars_of(movie):
+                    if distances.get(star) == depth - 1:
+                        steps.append((movie, star))
+                        previous_layer.add(star)
+        layer = sorted(previous_layer)
+        depth -= 1
+    return predecessors
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Yields every shortest list of (movie, person) pairs from source to
+    target, one at a time. Only the current path is held in memory besides
+    the shortest-path DAG, so paths can be enumerated lazily.
+    """
+    components = graph.indexes.get("components")
+    if components is not None and not components.connected(source, target):
+        return
+    predecessors = shortest_path_predecessors(graph, source, target)
+    if predecessors is None:
+        return
+
+    # Depth-first walk of the DAG from the target back to the source: each
+    # stack entry is a person with the iterator over its predecessors, and
+    # `steps` holds the (movie, person) pairs from the target back
+    stack = [(target, iter(predecessors[target]))]
+    steps = []
+    while stack:
+        person, remaining = stack[-1]
+        if person == source:
+            yield steps[::-1]
+        else:
+            step = next(remaining, None)
+            if step is not None:
+                movie, previous = step
+                steps.append((movie, person))
+                stack.append((previous, iter(predecessors[previous])))
+                continue
+        stack.pop()
+        if steps:
+            steps.pop()
+
+
+def shortest_path_tree(graph, source):
+    """
+    Breadth-first search from source over its whole component, expanding
+    every movie once. Returns (movies, parents) arrays giving, for each
+    person, the movie and the person one step closer to the source on a
+    shortest path, -1 for the source and for people it cannot reach.
+    """
+    movies = array("i", [-1]) * graph.person_count
+    parents = array("i", [-1]) * graph.person_count
+    seen_movies = bytearray(graph.movie_count)
+    parents[source] = source
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if parents[star] == -1:
+                        movies[star] = movie
+                        parents[star] = person
+                        next_layer.append(star)
+        layer = next_layer
+    parents[source] = -1
+    return movies, parents
+
+
+def tree_path(tree, source, target):
+    """
+    Returns the (movie, person) path from source to target in a shortest
+    path tree of source, or None if target is not in the tree.
+    """
+    movies, parents = tree
+    if target == source:
+        return []
+    if parents[target] == -1:
+        return None
+    path = []
+    person = target
+    while person != source:
+        path.append((movies[person], person))
+        person = parents[person]
+    path.reverse()
+    return path
+
+
+# Search modes available to degrees.shortest_path
+MODES = {
+    "bfs": breadth_first,
+    "bidirectional": bidirectional,
+    "bipartite": bipartite,
+    "landmark": landmark
+}
+
+
+def search(graph, source, target, mode="bidirectional"):
+    """
+    Runs the search engine of a mode between two person indexes. When the
+    graph has a component index, people in different components are
+    answered as not connected without searching.
+    """
+    components = graph.indexes.get("components")
+    if components is not None and not components.connected(source, target):
+        return None
+    return MODES[mode](graph, source, target)
@@ -0,0 +1,137 @@
+"""
+Year-filtered views of the degrees graph.
+
+A view keeps only the movies released in a range of years, so searches
+limited to those movies run on it without copying the graph. Its movies
+are found with two binary searches in a year-sorted movie index, and only
+the person side of the adjacency is rebuilt: a person's movies in the
+view are packed into a CSR table, while the stars of a kept movie are the
+same as in the graph. Views of repeated ranges come from an LRU cache.
+"""
+
+from array import array
+
+from cache import LRUCache
+from graph import INDEX, MISSING_YEAR, build_csr, lower_bound
+
+
+# Number of filtered views kept by a year index
+VIEW_CACHE_SIZE = 16
+
+
+class FilteredGraph():
+    """
+    View of a graph keeping only some of its movies. It provides what the
+    search engines use: person_count, movie_count, movies_of, stars_of,
+    neighbors and its own indexes.
+    """
+
+    def __init__(self, graph, movies):
+        self.graph = graph
+
+        rows, cols = array(INDEX), array(INDEX)
+        for movie in movies:
+            for star in graph.stars_of(movie):
+                rows.append(star)
+                cols.append(movie)
+        self.person_offsets, self.person_movies = build_csr(rows, cols, graph.person_count)
+
+        # Indexes computed on the view (landmarks, ...), as on a Graph
+        self.indexes = {}
+
+    @property
+    def person_count(self):
+        return self.graph.person_count
+
+    @property
+    def movie_count(self):
+        return self.graph.movie_count
+
+    def movies_of(self, person):
+        offsets = self.person_offsets
+        if person < len(offsets) - 1:
+            return self.person_movies[offsets[person]:offsets[person + 1]]
+        return ()
+
+    def stars_of(self, movie):
+        return self.graph.stars_of(movie)
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred with a
+        given person in a movie of the view.
+        """
+        result = set()
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                result.add((movie, star))
+        return result
+
+
+class YearIndex():
+    """
+    Movies of a graph sorted by year, and the filtered views built from it.
+    Movies without a year are left out of every view.
+    """
+
+    def __init__(self, graph, cache_size=VIEW_CACHE_SIZE):
+        self.graph = graph
+        years = graph.movie_years
+        self.order = array(INDEX, sorted(
+            (m for m in range(graph.movie_count) if years[m] != MISSING_YEAR),
+            key=years.__getitem__
+        ))
+        self.indexed = graph.movie_count
+        self.views = LRUCache(cache_size)
+
+    def movies_between(self, start=None, end=None):
+        """
+        Returns the movies released from year `start` to year `end`, both
+        included. Either bound may be None for an open range.
+        """
+        years = self.graph.movie_years
+        first = 0 if start is None else lower_bound(self.order, years.__getitem__, start)
+        last = len(self.order) if end is None else lower_bound(self.order, years.__getitem__, end + 1)
+        return self.order[first:last]
+
+    def view(self, start=None, end=None):
+        """
+        Returns the FilteredGraph of the movies released from `start` to
+        `end`, building it unless it is cached.
+        """
+        key = (start, end)
+        view = self.views.get(key)
+        if view is None:
+            view = FilteredGraph(self.graph, self.movies_between(start, end))
+            self.views.put(key, view)
+        return view
+
+    def update(self, graph, people, credits):
+        """
+        Indexes the movies added to the graph and drops the cached views
+        whose range includes the year of a movie given new credits.
+        """
+        years = graph.movie_years
+        for movie in range(self.indexed, graph.movie_count):
+            if years[movie] != MISSING_YEAR:
+                i = lower_bound(self.order, years.__getitem__, years[movie] + 1)
+                self.order.insert(i, movie)
+        self.indexed = graph.movie_count
+
+        changed = {years[movie] for _, movie in credits} - {MISSING_YEAR}
+        if changed:
+            self.views.discard_if(lambda key, view: any(
+                (key[0] is None or key[0] <= year) and (key[1] is None or year <= key[1])
+                for year in changed
+            ))
+
+
+def year_view(graph, start=None, end=None):
+    """
+    Returns the view of a graph limited to the movies released from `start`
+    to `end`, building its year index on first use.
+    """
+    index = graph.indexes.get("years")
+    if index is None:
+        index = graph.indexes["years"] = YearIndex(graph)
+    return index.view(start, end)
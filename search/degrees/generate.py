@@ -0,0 +1,122 @@
+"""
+Synthetic IMDb-like dataset generator for degrees.
+
+Writes people.csv, movies.csv and stars.csv with the same layout as the real
+data. Activity is heavy-tailed like in the IMDb: each person gets a Pareto
+distributed popularity, cast sizes are Pareto distributed too, and casts are
+drawn proportionally to popularity, so a few prolific actors appear in
+hundreds of movies while most people have a single credit.
+
+With an `era` of N people, each cast is drawn among N consecutive people
+only, as if people only worked with their contemporaries. Separations then
+grow with the number of eras, instead of staying within a few degrees.
+
+Usage: python generate.py directory [credits] [seed] [era]
+"""
+
+import bisect
+import csv
+import itertools
+import os
+import random
+import sys
+
+
+# Average number of credits per person and per movie (cast size)
+CREDITS_PER_PERSON = 3
+CREDITS_PER_MOVIE = 5
+
+# Pareto shape of popularity and cast sizes: lower means heavier tails
+POPULARITY_SHAPE = 1.8
+CAST_SHAPE = 1.5
+MAX_CAST = 500
+
+FIRST_NAMES = [
+    "Alice", "Bruno", "Chloe", "David", "Emma", "Farid", "Grace", "Hugo",
+    "Ines", "Jack", "Kenji", "Lena", "Marco", "Nadia", "Omar", "Paula",
+    "Quentin", "Rosa", "Samuel", "Tara", "Umberto", "Vera", "Walter", "Yuki"
+]
+LAST_NAMES = [
+    "Adams", "Bernard", "Costa", "Dubois", "Evans", "Fischer", "Garcia",
+    "Hansen", "Ito", "Jensen", "Kowalski", "Laurent", "Moreau", "Novak",
+    "Olsen", "Petit", "Rossi", "Silva", "Tanaka", "Weber", "Young", "Zhang"
+]
+TITLE_WORDS = [
+    "Night", "River", "Last", "Secret", "Summer", "Iron", "Silent", "Golden",
+    "Road", "City", "Storm", "Heart", "Shadow", "Kingdom", "Return", "Game"
+]
+
+
+def cast_size(rng):
+    """
+    Returns a heavy-tailed cast size averaging about CREDITS_PER_MOVIE.
+    """
+    scale = CREDITS_PER_MOVIE * (CAST_SHAPE - 1) / CAST_SHAPE
+    return min(MAX_CAST, max(1, round(scale * rng.paretovariate(CAST_SHAPE))))
+
+
+def generate(directory, credits=10000, seed=0, era=None):
+    """
+    Writes a dataset of about `credits` stars.csv rows to a directory and
+    returns the number of (people, movies, credits) written. Casts are drawn
+    among `era` consecutive people if given, among everyone otherwise.
+    """
+    rng = random.Random(seed)
+    n_people = max(2, credits // CREDITS_PER_PERSON)
+    n_movies = max(1, credits // CREDITS_PER_MOVIE)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            birth = rng.randint(1900, 2010) if rng.random() < 0.8 else ""
+            writer.writerow([i + 1, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for i in range(n_movies):
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+            writer.writerow([i + 1, title, rng.randint(1920, 2024)])
+
+    # Cumulative popularity for drawing casts with bisect
+    popularity = itertools.accumulate(
+        rng.paretovariate(POPULARITY_SHAPE) for _ in range(n_people)
+    )
+    cumulative = list(popularity)
+    era = n_people if era is None else max(1, min(era, n_people))
+
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(n_movies):
+            # Popularity range of the people of the movie's era
+            first = rng.randrange(n_people - era + 1) if era < n_people else 0
+            low = cumulative[first - 1] if first else 0
+            high = cumulative[first + era - 1]
+            cast = set()
+            for _ in range(cast_size(rng)):
+                cast.add(bisect.bisect(cumulative, low + rng.random() * (high - low)))
+            for person in sorted(cast):
+                writer.writerow([min(person, n_people - 1) + 1, movie + 1])
+            written += len(cast)
+    return n_people, n_movies, written
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 5:
+        sys.exit("Usage: python generate.py directory [credits] [seed] [era]")
+    directory = sys.argv[1]
+    credits = int(sys.argv[2]) if len(sys.argv) >= 3 else 10000
+    seed = int(sys.argv[3]) if len(sys.argv) >= 4 else 0
+    era = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    people, movies, written = generate(directory, credits, seed, era)
+    print(f"Wrote {people} people, {movies} movies and {written} credits to {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,683 @@
+"""
+Compact graph store for the degrees dataset.
+
+People and movies are interned to dense integers (their row number in the
+CSV files) and the cast graph is kept as two CSR adjacency tables:
+
+    person_offsets / person_movies : movies each person starred in
+    movie_offsets / movie_stars    : people starring in each movie
+
+Every table is an `array.array` (or a read-only memoryview of the same
+layout), so a person costs a few bytes of adjacency instead of a dict and a
+Python set of strings. String columns (ids, names, titles) are packed into
+a single UTF-8 blob with an offsets table, and string lookups go through
+sorted permutation arrays with binary search rather than hash tables.
+"""
+
+import csv
+import sys
+import tracemalloc
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+
+
+# Typecodes of the packed tables: 32 bits for row indices, 64 bits for
+# byte offsets into string blobs.
+INDEX = "i"
+OFFSET = "q"
+
+# Value stored in the birth/year columns when the CSV field is empty
+MISSING_YEAR = 0
+
+
+class StringTable():
+    """
+    List of strings stored as one UTF-8 blob and an offsets table.
+    Strings appended after the blob was packed are kept in `extra`.
+    """
+
+    def __init__(self, blob=b"", offsets=None):
+        self.blob = blob
+        self.offsets = offsets if offsets is not None else array(OFFSET, [0])
+        self.extra = []
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = array(OFFSET, [0])
+        offsets.extend(accumulate(map(len, encoded)))
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.extra)
+
+    def __getitem__(self, i):
+        packed = len(self.offsets) - 1
+        if i >= packed:
+            return self.extra[i - packed]
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, string):
+        self.extra.append(string)
+
+    def nbytes(self):
+        return len(self.blob) + len(self.offsets) * self.offsets.itemsize
+
+
+def lower_bound(order, key_for, key):
+    """
+    Returns the first position in `order` whose key is not less than `key`,
+    where `key_for(order[i])` gives the sort key of position i.
+    """
+    lo, hi = 0, len(order)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key_for(order[mid]) < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def build_csr(rows, cols, n):
+    """
+    Builds CSR (offsets, indices) tables for `n` rows from parallel arrays of
+    row and column indices. Each row is sorted and duplicate edges dropped.
+    """
+    # Counting sort of the edges by row
+    counts = [0] * (n + 1)
+    for row in rows:
+        counts[row + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    fill = counts[:-1]
+    indices = array(INDEX, bytes(len(rows) * array(INDEX).itemsize))
+    for row, col in zip(rows, cols):
+        indices[fill[row]] = col
+        fill[row] += 1
+
+    # Sort each row and remove duplicated edges
+    offsets = array(INDEX, [0])
+    packed = array(INDEX)
+    for i in range(n):
+        row = indices[counts[i]:counts[i + 1]]
+        if len(row) > 1:
+            row = sorted(set(row))
+        packed.extend(row)
+        offsets.append(len(packed))
+    return offsets, packed
+
+
+def appendable(table):
+    """
+    Returns a table that can be appended to: the table itself, or an array
+    copy of a read-only memoryview.
+    """
+    if isinstance(table, memoryview):
+        return array(table.format, table)
+    return table
+
+
+def parse_year(value):
+    return int(value) if value else MISSING_YEAR
+
+
+def format_year(value):
+    return str(value) if value != MISSING_YEAR else ""
+
+
+class GraphBuilder():
+    """
+    Accumulates people, movies and stars rows, then packs them into a Graph.
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = array(INDEX)
+        self.person_index = {}
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = array(INDEX)
+        self.movie_index = {}
+        self.star_people = array(INDEX)
+        self.star_movies = array(INDEX)
+
+    def add_person(self, person_id, name, birth):
+        i = self.person_index.get(person_id)
+        if i is None:
+            self.person_index[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(parse_year(birth))
+        else:
+            self.person_names[i] = name
+            self.person_births[i] = parse_year(birth)
+
+    def add_movie(self, movie_id, title, year):
+        i = self.movie_index.get(movie_id)
+        if i is None:
+            self.movie_index[movie_id] = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(parse_year(year))
+        else:
+            self.movie_titles[i] = title
+            self.movie_years[i] = parse_year(year)
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records that a person starred in a movie.
+        Rows referring to an unknown person or movie are skipped.
+        """
+        person = self.person_index.get(person_id)
+        movie = self.movie_index.get(movie_id)
+        if person is None or movie is None:
+            return False
+        self.star_people.append(person)
+        self.star_movies.append(movie)
+        return True
+
+    def add_people(self, ids, names, births):
+        """
+        Adds columns of people rows, with births as parsed years, like
+        add_person row by row. New ids are interned all at once.
+        """
+        start = len(self.person_ids)
+        index = dict(zip(ids, range(start, start + len(ids))))
+        if len(index) < len(ids) or not self.person_index.keys().isdisjoint(index):
+            # parse_year() keeps the years already parsed
+            for row in zip(ids, names, births):
+                self.add_person(*row)
+            return
+        self.person_index.update(index)
+        self.person_ids.extend(ids)
+        self.person_names.extend(names)
+        self.person_births.extend(births)
+
+    def add_movies(self, ids, titles, years):
+        """
+        Adds columns of movies rows, with parsed years, like add_movie row by
+        row. New ids are interned all at once.
+        """
+        start = len(self.movie_ids)
+        index = dict(zip(ids, range(start, start + len(ids))))
+        if len(index) < len(ids) or not self.movie_index.keys().isdisjoint(index):
+            for row in zip(ids, titles, years):
+                self.add_movie(*row)
+            return
+        self.movie_index.update(index)
+        self.movie_ids.extend(ids)
+        self.movie_titles.extend(titles)
+        self.movie_years.extend(years)
+
+    def add_stars(self, person_ids, movie_ids):
+        """
+        Adds columns of stars rows, like add_star row by row, and returns the
+        number of credits added.
+        """
+        people = list(map(self.person_index.get, person_ids))
+        movies = list(map(self.movie_index.get, movie_ids))
+        if None in people or None in movies:
+            known = [
+                (person, movie) for person, movie in zip(people, movies)
+                if person is not None and movie is not None
+            ]
+            people = [person for person, _ in known]
+            movies = [movie for _, movie in known]
+        self.star_people.extend(people)
+        self.star_movies.extend(movies)
+        return len(people)
+
+    def build(self, mapper=map):
+        """
+        Packs the rows into a Graph. `mapper` runs the builds of the two
+        adjacency tables, such as the map of a process pool.
+        """
+        graph = Graph()
+        graph.person_ids = StringTable.from_strings(self.person_ids)
+        graph.person_names = StringTable.from_strings(self.person_names)
+        graph.person_births = self.person_births
+        graph.movie_ids = StringTable.from_strings(self.movie_ids)
+        graph.movie_titles = StringTable.from_strings(self.movie_titles)
+        graph.movie_years = self.movie_years
+
+        n_people, n_movies = len(self.person_ids), len(self.movie_ids)
+        person_csr, movie_csr = mapper(
+            build_csr,
+            (self.star_people, self.star_movies),
+            (self.star_movies, self.star_people),
+            (n_people, n_movies)
+        )
+        graph.person_offsets, graph.person_movies = person_csr
+        graph.movie_offsets, graph.movie_stars = movie_csr
+
+        # Sorted permutations used for binary-search lookups
+        graph.person_order = array(INDEX, sorted(
+            range(n_people), key=self.person_ids.__getitem__
+        ))
+        graph.movie_order = array(INDEX, sorted(
+            range(n_movies), key=self.movie_ids.__getitem__
+        ))
+        lowercase_names = [name.lower() for name in self.person_names]
+        graph.name_order = array(INDEX, sorted(
+            range(n_people), key=lowercase_names.__getitem__
+        ))
+        return graph
+
+
+class Graph():
+    """
+    Cast graph with integer people and movies.
+
+    The packed tables are immutable. People, movies and credits added later
+    with add_person, add_movie and add_star are kept in small overlays
+    until compact() packs everything into a new graph.
+
+    Indexes computed from the graph (landmarks, ...) are kept in the
+    `indexes` dictionary so they live and die with the graph they describe.
+    """
+
+    def __init__(self):
+        self.person_ids = StringTable()
+        self.person_names = StringTable()
+        self.person_births = array(INDEX)
+        self.movie_ids = StringTable()
+        self.movie_titles = StringTable()
+        self.movie_years = array(INDEX)
+        self.person_offsets = array(INDEX, [0])
+        self.person_movies = array(INDEX)
+        self.movie_offsets = array(INDEX, [0])
+        self.movie_stars = array(INDEX)
+        self.person_order = array(INDEX)
+        self.movie_order = array(INDEX)
+        self.name_order = array(INDEX)
+
+        # Overlays of the people and movies added after packing, by id and by
+        # lowercase name, and of the credits added, by person and by movie
+        self.added_person_index = {}
+        self.added_movie_index = {}
+        self.added_names = {}
+        self.added_movies = {}
+        self.added_stars = {}
+
+        # Precomputed indexes derived from the tables, by name
+        self.indexes = {}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Loads people.csv, movies.csv and stars.csv from a directory.
+        """
+        builder = GraphBuilder()
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                builder.add_person(row["id"], row["name"], row["birth"])
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                builder.add_movie(row["id"], row["title"], row["year"])
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                builder.add_star(row["person_id"], row["movie_id"])
+        return builder.build()
+
+    @property
+    def person_count(self):
+        return len(self.person_births)
+
+    @property
+    def movie_count(self):
+        return len(self.movie_years)
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index of a person_id, or None if unknown.
+        """
+        order, ids = self.person_order, self.person_ids
+        i = lower_bound(order, ids.__getitem__, person_id)
+        if i < len(order) and ids[order[i]] == person_id:
+            return order[i]
+        return self.added_person_index.get(person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index of a movie_id, or None if unknown.
+        """
+        order, ids = self.movie_order, self.movie_ids
+        i = lower_bound(order, ids.__getitem__, movie_id)
+        if i < len(order) and ids[order[i]] == movie_id:
+            return order[i]
+        return self.added_movie_index.get(movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indexes of every person with this name, ignoring case.
+        """
+        key = name.lower()
+        order = self.name_order
+
+        def key_for(i):
+            return self.person_names[i].lower()
+
+        result = []
+        i = lower_bound(order, key_for, key)
+        while i < len(order) and key_for(order[i]) == key:
+            result.append(order[i])
+            i += 1
+        return result + self.added_names.get(key, [])
+
+    def movies_of(self, person):
+        offsets = self.person_offsets
+        if person < len(offsets) - 1:
+            movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        else:
+            movies = ()
+        if self.added_movies and person in self.added_movies:
+            return list(movies) + self.added_movies[person]
+        return movies
+
+    def stars_of(self, movie):
+        offsets = self.movie_offsets
+        if movie < len(offsets) - 1:
+            stars = self.movie_stars[offsets[movie]:offsets[movie + 1]]
+        else:
+            stars = ()
+        if self.added_stars and movie in self.added_stars:
+            return list(stars) + self.added_stars[movie]
+        return stars
+
+    @property
+    def updated(self):
+        """
+        True if people, movies or credits were added since packing.
+        """
+        return bool(self.added_person_index or self.added_movie_index or self.added_movies)
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person and returns its index. A person_id already in the graph
+        keeps its index and packed details.
+        """
+        i = self.person_index(person_id)
+        if i is not None:
+            return i
+        i = self.person_count
+        self.person_births = appendable(self.person_births)
+        self.person_births.append(parse_year(birth))
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.added_person_index[person_id] = i
+        self.added_names.setdefault(name.lower(), []).append(i)
+        return i
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie and returns its index. A movie_id already in the graph
+        keeps its index and packed details.
+        """
+        i = self.movie_index(movie_id)
+        if i is not None:
+            return i
+        i = self.movie_count
+        self.movie_years = appendable(self.movie_years)
+        self.movie_years.append(parse_year(year))
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.added_movie_index[movie_id] = i
+        return i
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records that a person starred in a movie, returning the (person,
+        movie) indexes of the new credit. Returns None, like the loader
+        skipping the row, for an unknown person or movie or a known credit.
+        """
+        person = self.person_index(person_id)
+        movie = self.movie_index(movie_id)
+        if person is None or movie is None or movie in self.movies_of(person):
+            return None
+        self.added_movies.setdefault(person, []).append(movie)
+        self.added_stars.setdefault(movie, []).append(person)
+        return person, movie
+
+    def compact(self):
+        """
+        Returns a new graph packing the tables and every addition together.
+        Indexes are not carried over.
+        """
+        builder = GraphBuilder()
+        for i in range(self.person_count):
+            builder.add_person(
+                self.person_ids[i], self.person_names[i],
+                format_year(self.person_births[i])
+            )
+        for i in range(self.movie_count):
+            builder.add_movie(
+                self.movie_ids[i], self.movie_titles[i],
+                format_year(self.movie_years[i])
+            )
+        for person in range(self.person_count):
+            for movie in self.movies_of(person):
+                builder.star_people.append(person)
+                builder.star_movies.append(movie)
+        return builder.build()
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred with a
+        given person.
+        """
+        result = set()
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                result.add((movie, star))
+        return result
+
+    def tables(self):
+        """
+        Yields (name, buffer, typecode) for every packed table of the graph.
+        Additions must be packed with compact() first.
+        """
+        if self.updated:
+            raise ValueError("graph has additions, compact() it first")
+
+        def typecode(table):
+            return table.typecode if isinstance(table, array) else table.format
+
+        for field, value in sorted(vars(self).items()):
+            if isinstance(value, StringTable):
+                yield f"{field}.blob", value.blob, "B"
+                yield f"{field}.offsets", value.offsets, typecode(value.offsets)
+            elif isinstance(value, (array, memoryview)):
+                yield field, value, typecode(value)
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the packed tables.
+        """
+        total = 0
+        for value in vars(self).values():
+            if isinstance(value, StringTable):
+                total += value.nbytes()
+            elif isinstance(value, (array, memoryview)):
+                total += len(value) * value.itemsize
+        return total
+
+    @property
+    def people(self):
+        return PeopleView(self)
+
+    @property
+    def movies(self):
+        return MoviesView(self)
+
+    @property
+    def names(self):
+        return NamesView(self)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` mapping of person_id to a dictionary of: name, birth,
+    movies (a set of movie_ids), built on access from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        i = self.graph.person_index(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        return {
+            "name": self.graph.person_names[i],
+            "birth": format_year(self.graph.person_births[i]),
+            "movies": {self.graph.movie_ids[m] for m in self.graph.movies_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.person_count
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` mapping of movie_id to a dictionary of: title, year,
+    stars (a set of person_ids), built on access from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        i = self.graph.movie_index(movie_id)
+        if i is None:
+            raise KeyError(movie_id)
+        return {
+            "title": self.graph.movie_titles[i],
+            "year": format_year(self.graph.movie_years[i]),
+            "stars": {self.graph.person_ids[p] for p in self.graph.stars_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.movie_count
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` mapping of lowercase names to a set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        person_ids = {self.graph.person_ids[i] for i in self.graph.people_named(name)}
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        previous = None
+        for i in self.graph.name_order:
+            name = self.graph.person_names[i].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+        # Names only carried by people added since packing
+        packed = len(self.graph.person_offsets) - 1
+        for name in self.graph.added_names:
+            if min(self.graph.people_named(name)) >= packed:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def load_dict_layout(directory):
+    """
+    Loads the dataset into the original dictionary layout, returning
+    (names, people, movies). Kept as the baseline for memory reports.
+    """
+    names, people, movies = {}, {}, {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+    return names, people, movies
+
+
+def measure(loader, *args):
+    """
+    Returns (result, bytes allocated and still held) for a loader call.
+    """
+    tracemalloc.start()
+    try:
+        result = loader(*args)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current
+
+
+def memory_report(directory):
+    """
+    Compares the memory held by the dictionary layout and the CSR graph.
+    """
+    _, dict_bytes = measure(load_dict_layout, directory)
+    graph, graph_bytes = measure(Graph.from_csv, directory)
+    return {
+        "people": graph.person_count,
+        "movies": graph.movie_count,
+        "credits": len(graph.person_movies),
+        "dict_bytes": dict_bytes,
+        "graph_bytes": graph_bytes,
+        "graph_table_bytes": graph.nbytes(),
+        "ratio": dict_bytes / graph_bytes if graph_bytes else 0.0
+    }
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python graph.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+
+    report = memory_report(directory)
+    print(f"{report['people']} people, {report['movies']} movies, {report['credits']} credits")
+    print(f"Dictionary layout: {report['dict_bytes']:,} bytes")
+    print(f"CSR graph:         {report['graph_bytes']:,} bytes "
+          f"({report['graph_table_bytes']:,} bytes of packed tables)")
+    print(f"Saving:            {report['ratio']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
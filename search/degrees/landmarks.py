@@ -0,0 +1,168 @@
+"""
+Landmark distance index for degrees of separation.
+
+A breadth-first search is run from a few well-connected landmark people and
+the distance of every person to each landmark is kept. By the triangle
+inequality, for any two people s and t and any landmark L:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+so the index bounds the separation of any pair in O(landmarks) time, and
+the bounds prune the exact search (see engines.landmark).
+"""
+
+import math
+from array import array
+from collections import deque
+
+
+# Number of landmarks picked when none are given
+DEFAULT_LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = -1
+
+
+def bfs_distances(graph, source):
+    """
+    Returns an array of the degrees of separation of every person from
+    source, UNREACHED for people in another component.
+    """
+    distances = array("h", [UNREACHED]) * graph.person_count
+    seen_movies = bytearray(graph.movie_count)
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if distances[star] == UNREACHED:
+                        distances[star] = depth
+                        next_layer.append(star)
+        layer = next_layer
+    return distances
+
+
+def highest_degree(graph, count):
+    """
+    Returns the `count` people with the most credited co-stars, counting a
+    co-star once per shared movie.
+    """
+    cast_sizes = [len(graph.stars_of(m)) for m in range(graph.movie_count)]
+    degrees = [
+        sum(cast_sizes[m] for m in graph.movies_of(p)) - len(graph.movies_of(p))
+        for p in range(graph.person_count)
+    ]
+    ranked = sorted(range(graph.person_count), key=degrees.__getitem__, reverse=True)
+    return ranked[:count]
+
+
+class LandmarkIndex():
+    """
+    Distances from a set of landmark people to every person of a graph.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+        # Largest distance of anyone from each landmark
+        self.radii = [max(d, default=UNREACHED) for d in distances]
+
+    @classmethod
+    def build(cls, graph, count=DEFAULT_LANDMARKS, landmarks=None):
+        """
+        Runs a BFS from each landmark, given as person indexes, or from the
+        `count` highest-degree people when no landmarks are given.
+        """
+        if landmarks is None:
+            landmarks = highest_degree(graph, count)
+        return cls(list(landmarks), [bfs_distances(graph, person) for person in landmarks])
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the separation of two people.
+
+        The upper bound is math.inf when no landmark reaches them, and both
+        bounds are math.inf when a landmark proves them disconnected.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 0, math.inf
+        for distances in self.distances:
+            s, t = distances[source], distances[target]
+            if s == UNREACHED and t == UNREACHED:
+                continue
+            if s == UNREACHED or t == UNREACHED:
+                return math.inf, math.inf
+            lower = max(lower, abs(s - t))
+            upper = min(upper, s + t)
+        return lower, upper
+
+    def reach(self, target):
+        """
+        Returns the (distances, distance of target) of the landmarks reaching
+        target, and the largest lower bound on the separation of anyone from
+        target they can give.
+        """
+        landmarks = []
+        farthest = 0
+        for distances, radius in zip(self.distances, self.radii):
+            t = distances[target]
+            if t != UNREACHED:
+                landmarks.append((distances, t))
+                farthest = max(farthest, t, radius - t)
+        return landmarks, farthest
+
+    def update(self, graph, people, credits):
+        """
+        Updates the distances after `people` and (person, movie) `credits`
+        were added to the graph. Added credits can only shorten distances,
+        so the decreases are propagated from the stars of updated movies.
+        """
+        for i, distances in enumerate(self.distances):
+            while len(distances) < graph.person_count:
+                distances.append(UNREACHED)
+            # People the landmark did not reach may now be its farthest
+            radius = self.radii[i]
+            queue = deque()
+            for _, movie in credits:
+                stars = graph.stars_of(movie)
+                reached = [distances[star] for star in stars if distances[star] != UNREACHED]
+                if not reached:
+                    continue
+                depth = min(reached) + 1
+                for star in stars:
+                    if distances[star] == UNREACHED or distances[star] > depth:
+                        distances[star] = depth
+                        radius = max(radius, depth)
+                        queue.append(star)
+            while queue:
+                person = queue.popleft()
+                depth = distances[person] + 1
+                for movie in graph.movies_of(person):
+                    for star in graph.stars_of(movie):
+                        if distances[star] == UNREACHED or distances[star] > depth:
+                            distances[star] = depth
+                            radius = max(radius, depth)
+                            queue.append(star)
+            self.radii[i] = radius
+
+    def nbytes(self):
+        return sum(len(d) * d.itemsize for d in self.distances)
+
+
+def landmark_index(graph):
+    """
+    Returns the landmark index of a graph, building the default one on first
+    use.
+    """
+    index = graph.indexes.get("landmarks")
+    if index is None:
+        index = graph.indexes["landmarks"] = LandmarkIndex.build(graph)
+    return index
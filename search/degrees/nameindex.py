@@ -0,0 +1,201 @@
+"""
+Prefix and typo-tolerant name lookups over a Graph.
+
+Prefix searches run on the graph's `name_order` permutation, which sorts
+people by lowercase name and is built with the graph (and kept in its
+snapshot), with two binary searches. Fuzzy searches use a trigram index
+over the distinct lowercase names, built on the first fuzzy search:
+candidates sharing the most trigrams with the query are scored by their
+Dice coefficient
+
+    2 * |shared trigrams| / (|query trigrams| + |name trigrams|)
+
+so a misspelled name still finds the intended person.
+"""
+
+import math
+from array import array
+from collections import Counter
+
+from graph import format_year, lower_bound
+
+
+# Candidates kept from the trigram counts before scoring them
+FUZZY_POOL = 200
+
+# Candidates scoring below this are not considered matches
+MIN_SCORE = 0.3
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a lowercase name, padded with spaces so
+    that short names and word boundaries get trigrams too.
+    """
+    padded = f" {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Name lookups for the people of a graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+        # Trigram index, built on the first fuzzy search: position in
+        # name_order of the first person of each distinct name, and the
+        # distinct names containing each trigram
+        self.starts = None
+        self.postings = None
+
+        # People added to the graph since its name_order was built
+        self.added = sorted(graph.added_person_index.values())
+
+    def build_trigrams(self):
+        graph = self.graph
+        self.starts = array("i")
+        self.postings = {}
+        previous = None
+        for position, person in enumerate(graph.name_order):
+            name = graph.person_names[person].lower()
+            if name == previous:
+                continue
+            previous = name
+            for gram in trigrams(name):
+                postings = self.postings.get(gram)
+                if postings is None:
+                    postings = self.postings[gram] = array("i")
+                postings.append(len(self.starts))
+            self.starts.append(position)
+
+    def update(self, graph, people, credits):
+        """
+        Makes `people` added to the graph searchable by prefix and similarity.
+        """
+        self.added.extend(people)
+
+    def lowercase_name(self, position):
+        return self.graph.person_names[self.graph.name_order[position]].lower()
+
+    def people_at(self, distinct):
+        """
+        Returns the people sharing the distinct name number `distinct`.
+        """
+        order = self.graph.name_order
+        start = self.starts[distinct]
+        end = self.starts[distinct + 1] if distinct + 1 < len(self.starts) else len(order)
+        return list(order[start:end])
+
+    def exact(self, name):
+        """
+        Returns the people whose name is `name`, ignoring case.
+        """
+        return self.graph.people_named(name)
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns the people whose name starts with `prefix`, ignoring case,
+        in name order.
+        """
+        prefix = prefix.lower()
+        order = self.graph.name_order
+        start = lower_bound(range(len(order)), self.lowercase_name, prefix)
+        # Every name with the prefix sorts below the prefix followed by the
+        # highest code point
+        end = lower_bound(range(len(order)), self.lowercase_name, prefix + "\U0010ffff")
+        if limit is not None:
+            end = min(end, start + limit)
+        result = list(order[start:end])
+        result += [
+            person for person in self.added
+            if self.graph.person_names[person].lower().startswith(prefix)
+        ]
+        return result[:limit]
+
+    def fuzzy(self, name, limit=10, min_score=MIN_SCORE):
+        """
+        Returns up to `limit` (score, person) pairs for the names most similar
+        to `name`, best first.
+        """
+        if self.postings is None:
+            self.build_trigrams()
+        query = trigrams(name.lower())
+
+        # A name scoring at least min_score shares at least `needed` trigrams
+        # with the query, so it appears in the postings of any
+        # len(query) - needed + 1 of them: only the rarest are scanned
+        needed = max(1, math.ceil(min_score * len(query) / (2 - min_score)))
+        postings = sorted((self.postings.get(gram, ()) for gram in query), key=len)
+        counts = Counter()
+        for grams in postings[:len(query) - needed + 1]:
+            counts.update(grams)
+
+        scored = []
+        for distinct, _ in counts.most_common(FUZZY_POOL):
+            candidate = trigrams(self.lowercase_name(self.starts[distinct]))
+            score = 2 * len(query & candidate) / (len(query) + len(candidate))
+            if score >= min_score:
+                scored.append((score, distinct))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        result = []
+        for score, distinct in scored:
+            for person in self.people_at(distinct):
+                result.append((score, person))
+
+        # Few people are added between compactions: score them all
+        for person in self.added:
+            candidate = trigrams(self.graph.person_names[person].lower())
+            score = 2 * len(query & candidate) / (len(query) + len(candidate))
+            if score >= min_score:
+                result.append((score, person))
+        result.sort(key=lambda item: -item[0])
+        return result[:limit]
+
+    def resolve(self, name, limit=10):
+        """
+        Returns up to `limit` ranked candidates for a name, without asking
+        anything: exact matches first, then prefix matches, then similar
+        names. Each candidate is a dictionary of: person_id, name, birth,
+        match ("exact", "prefix" or "fuzzy") and score.
+        """
+        ranked = [(1.0, "exact", person) for person in self.exact(name)]
+        if len(ranked) < limit:
+            ranked += [
+                (1.0, "prefix", person)
+                for person in self.prefix(name, limit)
+            ]
+        if len(ranked) < limit:
+            ranked += [
+                (score, "fuzzy", person)
+                for score, person in self.fuzzy(name, limit)
+            ]
+
+        candidates = []
+        seen = set()
+        for score, match, person in ranked:
+            if person in seen:
+                continue
+            seen.add(person)
+            candidates.append({
+                "person_id": self.graph.person_ids[person],
+                "name": self.graph.person_names[person],
+                "birth": format_year(self.graph.person_births[person]),
+                "match": match,
+                "score": round(score, 3)
+            })
+            if len(candidates) == limit:
+                break
+        return candidates
+
+
+def name_index(graph):
+    """
+    Returns the name index of a graph, building it on first use.
+    """
+    index = graph.indexes.get("names")
+    if index is None:
+        index = graph.indexes["names"] = NameIndex(graph)
+    return index
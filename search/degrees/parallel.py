@@ -0,0 +1,163 @@
+"""
+Parallel batch searches over a graph shared between processes.
+
+The tables of the graph are copied once into a shared memory segment, laid
+out as in a snapshot, and every worker of a process pool maps that segment
+when it starts, so no worker reloads or copies the graph. Queries are
+grouped by source: a source asked for many targets is answered from a
+single shortest path tree, the others by the search engine of a mode.
+
+Usage: python parallel.py [directory] [queries] [workers]
+"""
+
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+
+from engines import search, shortest_path_tree, tree_path
+from snapshot import graph_from_sections, layout, load_graph
+
+
+# Sources with at least this many targets are answered from one tree
+TREE_THRESHOLD = 8
+
+# Query groups sent to a worker at a time
+CHUNK_GROUPS = 16
+
+# Graph of a worker process, mapped from the shared segment by attach()
+worker_segment = None
+worker_graph = None
+
+
+class SharedGraph():
+    """
+    Copy of the tables of a graph in a shared memory segment, released when
+    used as a context manager. Additions must be packed with compact() first.
+    """
+
+    def __init__(self, graph):
+        self.sections, buffers, size = layout(graph)
+        self.segment = shared_memory.SharedMemory(create=True, size=max(1, size))
+        for (offset, length, _), data in zip(self.sections.values(), buffers):
+            self.segment.buf[offset:offset + length] = data
+
+    @property
+    def name(self):
+        return self.segment.name
+
+    def close(self):
+        self.segment.close()
+        self.segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(name, sections):
+    """
+    Maps the graph of a shared segment in a worker process.
+    """
+    global worker_segment, worker_graph
+    worker_segment = shared_memory.SharedMemory(name=name)
+    worker_graph = graph_from_sections(worker_segment.buf, sections)
+
+
+def answer_group(graph, source, targets, mode):
+    """
+    Returns the paths from source to each target: from one shortest path
+    tree when there are many targets, by searching each pair otherwise.
+    """
+    if len(targets) >= TREE_THRESHOLD:
+        tree = shortest_path_tree(graph, source)
+        return [tree_path(tree, source, target) for target in targets]
+    return [search(graph, source, target, mode) for target in targets]
+
+
+def worker_answer_group(source, targets, mode):
+    return answer_group(worker_graph, source, targets, mode)
+
+
+def shortest_paths(graph, pairs, mode="bidirectional", workers=None):
+    """
+    Returns, in order, a shortest list of (movie, person) pairs or None for
+    each (source, target) pair of person indexes, searched by a pool of
+    `workers` processes sharing the graph (in this process if `workers` is
+    1). Paths answered from a tree are shortest, but may differ from the
+    ones the mode would find.
+    """
+    groups = defaultdict(list)
+    for position, (source, target) in enumerate(pairs):
+        groups[source].append((position, target))
+    sources = list(groups)
+    targets = [[target for _, target in groups[source]] for source in sources]
+
+    if workers == 1:
+        answers = map(answer_group, repeat(graph), sources, targets, repeat(mode))
+        return collect(groups, sources, answers, len(pairs))
+
+    with SharedGraph(graph) as shared:
+        with ProcessPoolExecutor(workers, initializer=attach,
+                                 initargs=(shared.name, shared.sections)) as pool:
+            answers = pool.map(worker_answer_group, sources, targets, repeat(mode),
+                               chunksize=CHUNK_GROUPS)
+            return collect(groups, sources, answers, len(pairs))
+
+
+def collect(groups, sources, answers, count):
+    """
+    Puts the paths answered for each source back in the order of the pairs.
+    """
+    paths = [None] * count
+    for source, group_paths in zip(sources, answers):
+        for (position, _), path in zip(groups[source], group_paths):
+            paths[position] = path
+    return paths
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python parallel.py [directory] [queries] [workers]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "small"
+    queries = int(sys.argv[2]) if len(sys.argv) >= 3 else 1000
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else os.cpu_count()
+
+    graph = load_graph(directory)
+    rng = random.Random(0)
+    pairs = [
+        (rng.randrange(graph.person_count), rng.randrange(graph.person_count))
+        for _ in range(queries)
+    ]
+
+    start = time.perf_counter()
+    serial = shortest_paths(graph, pairs, workers=1)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = shortest_paths(graph, pairs, workers=workers)
+    parallel_time = time.perf_counter() - start
+
+    source = pairs[0][0] if pairs else 0
+    everyone = [(source, target) for target in range(graph.person_count)]
+    start = time.perf_counter()
+    shortest_paths(graph, everyone, workers=1)
+    tree_time = time.perf_counter() - start
+
+    print(f"Serial:        {serial_time:.3f}s for {queries} queries")
+    print(f"Parallel:      {parallel_time:.3f}s ({workers} workers)")
+    print(f"Speedup:       {serial_time / parallel_time:.2f}x")
+    print(f"Single source: {tree_time:.3f}s for all {graph.person_count} people")
+    lengths = [path and len(path) for path in serial]
+    if lengths != [path and len(path) for path in parallel]:
+        sys.exit("Parallel searches found different separations.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Versioned binary snapshots of a Graph.
+
+A snapshot file is laid out as:
+
+    magic (8 bytes) | version (uint32) | header length (uint32) | header JSON
+    | padding | raw tables, each aligned on 8 bytes
+
+The JSON header records the size and modification time of the CSV files the
+graph was built from, and the offset, length and typecode of every table.
+Loading a snapshot memory-maps the file and exposes each table as a
+read-only memoryview, so nothing is parsed or copied at startup.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, StringTable
+from ingest import load_csv
+
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+
+class StaleSnapshot(Exception):
+    """
+    Raised when a snapshot is missing, unreadable or out of date.
+    """
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the (size, mtime) of each CSV file of a dataset directory.
+    """
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def layout(graph):
+    """
+    Returns (sections, buffers, size) to lay the tables of a graph out one
+    after another, each aligned on ALIGNMENT bytes. `sections` maps every
+    table name to its [offset, length, typecode].
+    """
+    sections = {}
+    offset = 0
+    buffers = []
+    for name, buffer, typecode in graph.tables():
+        data = memoryview(buffer).cast("B")
+        sections[name] = [offset, len(data), typecode]
+        buffers.append(data)
+        offset += len(data) + (-len(data) % ALIGNMENT)
+    return sections, buffers, offset
+
+
+def graph_from_sections(view, sections):
+    """
+    Returns the Graph whose tables are laid out in a byte memoryview as
+    described by `sections`, without copying them.
+    """
+    def section(name):
+        try:
+            offset, length, typecode = sections[name]
+        except KeyError:
+            raise StaleSnapshot(f"snapshot has no table {name}")
+        return view[offset:offset + length].cast(typecode)
+
+    graph = Graph()
+    for field, value in vars(graph).items():
+        if isinstance(value, StringTable):
+            blob = section(f"{field}.blob")
+            setattr(graph, field, StringTable(blob, section(f"{field}.offsets")))
+        elif isinstance(value, (array, memoryview)):
+            setattr(graph, field, section(field))
+    return graph
+
+
+def save_snapshot(graph, directory):
+    """
+    Writes the snapshot of a graph built from the CSV files of a directory.
+    The file is written aside and renamed, so readers never see it partial.
+    """
+    sections, buffers, _ = layout(graph)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "sections": sections
+    }).encode("utf-8")
+    start = PREAMBLE.size + len(header)
+    start += -start % ALIGNMENT
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(bytes(start - f.tell()))
+        for data in buffers:
+            f.write(data)
+            f.write(bytes(-len(data) % ALIGNMENT))
+    os.replace(temporary, path)
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot of a directory and returns its Graph.
+
+    Raises StaleSnapshot if there is no snapshot, if it was written by
+    another version or platform, or if the CSV files changed since.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise StaleSnapshot(str(e))
+
+    try:
+        magic, version, header_length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise StaleSnapshot("unknown snapshot version")
+        header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length])
+    except (struct.error, ValueError) as e:
+        raise StaleSnapshot(str(e))
+    if header["byteorder"] != sys.byteorder:
+        raise StaleSnapshot("snapshot written on another platform")
+    if header["sources"] != source_stamps(directory):
+        raise StaleSnapshot("CSV files changed since the snapshot")
+
+    start = PREAMBLE.size + header_length
+    start += -start % ALIGNMENT
+    return graph_from_sections(memoryview(buffer)[start:], header["sections"])
+
+
+def load_graph(directory, snapshot=True, workers=None):
+    """
+    Returns the Graph of a directory, from its snapshot when it is up to date.
+    Otherwise the CSV files are parsed, by `workers` processes when they are
+    large, and if `snapshot` is set a new snapshot is written for the next
+    start.
+    """
+    if snapshot:
+        try:
+            return load_snapshot(directory)
+        except StaleSnapshot:
+            pass
+
+    graph = load_csv(directory, workers)
+    if snapshot:
+        try:
+            save_snapshot(graph, directory)
+        except OSError:
+            # Read-only dataset directory: keep running without a snapshot
+            pass
+    return graph
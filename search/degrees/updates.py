@@ -0,0 +1,92 @@
+"""
+Incremental updates of a loaded degrees graph.
+
+New rows appended to people.csv, movies.csv or stars.csv are given as delta
+CSV files with the same headers. They are added to the graph overlays (see
+Graph.add_person, add_movie and add_star), the indexes of the graph are
+patched in place, and only the cached paths the new credits may change are
+dropped, so a query process picks up new credits without reloading.
+"""
+
+import csv
+
+
+def read_rows(filename):
+    with open(filename, encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def apply_update(graph, people=None, movies=None, stars=None, caches=()):
+    """
+    Adds the rows of delta CSV files to a graph and returns a summary of
+    the update.
+
+    Indexes of the graph providing update(graph, people, credits) are
+    patched, other indexes are dropped to be rebuilt on next use. Entries of
+    the LRU path caches in `caches`, keyed by (source, target) person
+    indexes, are dropped when the new credits may change them.
+    """
+    added_people = []
+    added_movies = 0
+    credits = []
+    skipped = 0
+
+    if people:
+        for row in read_rows(people):
+            count = graph.person_count
+            person = graph.add_person(row["id"], row["name"], row["birth"])
+            if person == count:
+                added_people.append(person)
+    if movies:
+        for row in read_rows(movies):
+            count = graph.movie_count
+            if graph.add_movie(row["id"], row["title"], row["year"]) == count:
+                added_movies += 1
+    if stars:
+        for row in read_rows(stars):
+            credit = graph.add_star(row["person_id"], row["movie_id"])
+            if credit is None:
+                skipped += 1
+            else:
+                credits.append(credit)
+
+    components = graph.indexes.get("components")
+    invalidated = 0
+    if credits:
+        # Paths can only get shorter, and only between people of the
+        # components the new credits touch, as labeled before the update
+        if components is None:
+            invalidated += sum(len(cache) for cache in caches)
+            for cache in caches:
+                cache.clear()
+        else:
+            touched = set()
+            for person, movie in credits:
+                for star in graph.stars_of(movie):
+                    if star < len(components.labels):
+                        touched.add(components.labels[star])
+            for cache in caches:
+                invalidated += cache.discard_if(
+                    lambda key, path: path is not None and components.labels[key[0]] in touched
+                )
+
+    for name, index in list(graph.indexes.items()):
+        if hasattr(index, "update"):
+            index.update(graph, added_people, credits)
+        elif credits or added_people:
+            del graph.indexes[name]
+
+    if credits and components is not None:
+        # People who were not connected may be now
+        for cache in caches:
+            invalidated += cache.discard_if(
+                lambda key, path: path is None and components.connected(*key)
+            )
+
+    return {
+        "people": len(added_people),
+        "movies": added_movies,
+        "credits": len(credits),
+        "skipped": skipped,
+        "invalidated": invalidated
+    }
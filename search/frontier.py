@@ -0,0 +1,113 @@
+"""
+Search nodes and frontiers shared by the search projects.
+
+Every frontier keeps the states it holds in a dictionary, so
+contains_state is O(1), and add/remove are amortized O(1) for the stack
+and the queue and O(log n) for the priority frontier.
+"""
+
+import heapq
+import itertools
+from collections import deque
+
+
+class Node():
+    __slots__ = ("state", "parent", "action", "cost")
+
+    def __init__(self, state, parent, action, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+
+class StackFrontier():
+    def __init__(self):
+        self.frontier = deque()
+
+        # Number of nodes of each state in the frontier
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def take(self):
+        return self.frontier.pop()
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.take()
+        count = self.states.pop(node.state)
+        if count > 1:
+            self.states[node.state] = count - 1
+        return node
+
+
+class QueueFrontier(StackFrontier):
+
+    def take(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier():
+    """
+    Frontier removing the node of lowest priority first, ties in insertion
+    order. Adding a state already in the frontier with a lower priority
+    replaces its node (decrease-key), and with a higher one is ignored.
+    """
+
+    def __init__(self):
+        # Heap of [priority, order, node] entries, node None once replaced
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, node, priority):
+        """
+        Adds a node, and returns whether it was added.
+        """
+        entry = self.entries.get(node.state)
+        if entry is not None:
+            if entry[0] <= priority:
+                return False
+            entry[2] = None
+        entry = [priority, next(self.counter), node]
+        self.entries[node.state] = entry
+        heapq.heappush(self.heap, entry)
+        return True
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def priority_of(self, state):
+        """
+        Returns the priority of a state in the frontier, or None.
+        """
+        entry = self.entries.get(state)
+        return entry[0] if entry is not None else None
+
+    def empty(self):
+        return len(self.entries) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        while True:
+            _, _, node = heapq.heappop(self.heap)
+            if node is not None:
+                del self.entries[node.state]
+                return node
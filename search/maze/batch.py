@@ -0,0 +1,185 @@
+"""
+Batch maze solving.
+
+Solves every maze file given as a file, a directory (its .txt files) or a
+glob pattern with one strategy, in a pool of worker processes, and reports
+the path length, states explored and times of each maze as a table and
+optionally as a JSON or CSV file. Images are only drawn when asked for.
+
+Usage: python batch.py PATH [PATH ...] [--strategy S] [--heuristic H]
+                       [--workers N] [--report FILE] [--images DIR] [--memory MIB]
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from maze import HEURISTICS, SEARCH_MEMORY_BYTES, STRATEGY_NAMES, Maze
+
+
+# Columns of the report, in order
+FIELDS = [
+    "file", "strategy", "height", "width", "length", "explored",
+    "load_seconds", "solve_seconds", "fallback", "error"
+]
+
+
+def maze_files(paths):
+    """
+    Returns the maze files named by files, directories and glob patterns,
+    in order and without duplicates. Raises FileNotFoundError for paths
+    that neither exist nor match any file.
+    """
+    files = []
+    missing = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "*.txt")))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            matches = sorted(glob.glob(path))
+            if not matches:
+                missing.append(path)
+            files += matches
+    if missing:
+        raise FileNotFoundError(f"no such maze file or pattern: {', '.join(missing)}")
+    return list(dict.fromkeys(files))
+
+
+def image_paths(files, directory):
+    """
+    Returns the image file of each maze file in a directory, at its path
+    from the common directory of the maze files, so that mazes of the same
+    name in different directories do not overwrite each other's images.
+    """
+    paths = [os.path.abspath(filename) for filename in files]
+    if not paths:
+        return []
+    base = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [
+        os.path.join(directory, os.path.splitext(os.path.relpath(path, base))[0] + ".png")
+        for path in paths
+    ]
+
+
+def solve_file(filename, strategy="astar", heuristic="manhattan", image=None,
+               memory_limit=SEARCH_MEMORY_BYTES):
+    """
+    Solves a maze file and returns its report row, drawing the solved maze
+    to the `image` file if given. Errors, such as a maze without solution,
+    are reported in the row rather than raised.
+    """
+    row = dict.fromkeys(FIELDS)
+    row.update(file=filename, strategy=strategy)
+    try:
+        start = time.perf_counter()
+        m = Maze(filename)
+        row["load_seconds"] = time.perf_counter() - start
+    except Exception as e:
+        row["error"] = str(e)
+        return row
+
+    row["height"], row["width"] = m.height, m.width
+    m.memory_limit = memory_limit
+    try:
+        m.solve(strategy, heuristic)
+    except Exception as e:
+        row["error"] = str(e)
+    # A solve failing before its search started leaves no counts
+    row["explored"] = getattr(m, "num_explored", None)
+    row["solve_seconds"] = m.solve_time
+    row["fallback"] = m.fallback
+    if row["error"]:
+        return row
+
+    row["length"] = len(m.solution[0])
+    if image is not None:
+        os.makedirs(os.path.dirname(image) or ".", exist_ok=True)
+        m.output_image(image, show_explored=True)
+    return row
+
+
+def solve_files(files, strategy="astar", heuristic="manhattan", workers=None, images=None,
+                memory_limit=SEARCH_MEMORY_BYTES):
+    """
+    Yields the report rows of maze files, in order, solved by a pool of
+    `workers` processes (in this process if `workers` is 1). Solved mazes
+    are drawn to the `images` directory if given (see image_paths).
+    """
+    images = repeat(None) if images is None else image_paths(files, images)
+    arguments = (files, repeat(strategy), repeat(heuristic), images, repeat(memory_limit))
+    if workers == 1:
+        yield from map(solve_file, *arguments)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(solve_file, *arguments)
+
+
+def write_report(rows, filename):
+    """
+    Writes report rows to a CSV file if its name ends in .csv, and to a
+    JSON file otherwise.
+    """
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        if filename.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve many mazes in parallel.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="maze file, directory of .txt mazes, or glob pattern")
+    parser.add_argument("--strategy", choices=STRATEGY_NAMES, default="astar")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="manhattan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--report", metavar="FILE", help="write the report to FILE (.json or .csv)")
+    parser.add_argument("--images", metavar="DIR",
+                        help="draw each solved maze to DIR/<path>.png")
+    parser.add_argument("--memory", type=float, metavar="MIB",
+                        default=SEARCH_MEMORY_BYTES / 2 ** 20,
+                        help="memory ceiling of the idastar and beam strategies (default 256)")
+    args = parser.parse_args()
+
+    try:
+        files = maze_files(args.paths)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not files:
+        sys.exit("No maze files found.")
+
+    start = time.perf_counter()
+    rows = []
+    print(f"{'file':<40}{'length':>8}{'explored':>10}{'solve ms':>10}")
+    results = solve_files(
+        files, args.strategy, args.heuristic, args.workers, args.images,
+        int(args.memory * 2 ** 20)
+    )
+    for row in results:
+        rows.append(row)
+        if row["error"]:
+            print(f"{row['file']:<40}  {row['error']}")
+        else:
+            print(f"{row['file']:<40}{row['length']:>8}{row['explored']:>10}"
+                  f"{row['solve_seconds'] * 1000:>10.2f}"
+                  + (f"  ({row['fallback']})" if row["fallback"] else ""))
+    elapsed = time.perf_counter() - start
+
+    solved = sum(1 for row in rows if not row["error"])
+    print(f"{solved} of {len(rows)} mazes solved in {elapsed:.3f}s", file=sys.stderr)
+    if args.report:
+        write_report(rows, args.report)
+
+
+if __name__ == "__main__":
+    main()
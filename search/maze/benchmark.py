@@ -0,0 +1,190 @@
+"""
+Benchmark suite for the maze solver.
+
+Runs every solver strategy on a set of mazes and records, for each maze,
+the time and peak memory of loading it, and for each strategy the path
+length, states explored, wall time and peak memory of solving it. Without
+maze files, the suite is one generated maze of each kind of generate.py,
+written to a directory on first use and reused afterwards, so the results
+of two runs can be compared to find regressions.
+
+Usage: python benchmark.py [PATH ...] [--size N] [--directory DIR]
+                           [--strategies S ...] [--json FILE] [--baseline FILE]
+
+For example:
+    python benchmark.py --size 2001 --json before.json
+    python benchmark.py --size 2001 --baseline before.json
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from batch import maze_files
+from generate import KINDS, generate, write_maze
+from maze import HEURISTICS, STRATEGY_NAMES, Maze
+
+
+# Side of the generated mazes, and where they are written
+SUITE_SIZE = 501
+SUITE_DIRECTORY = "benchmarks"
+
+# Largest number of cells on which slow strategies run unless asked for:
+# IDA* expands the cells of open rooms many times over
+SLOW_STRATEGIES = {"idastar": 10 ** 5}
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of a call.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(function, *args, **kwargs):
+    """
+    Returns the peak number of bytes allocated during a call.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def suite(directory=SUITE_DIRECTORY, size=SUITE_SIZE, seed=0):
+    """
+    Returns the files of one size x size maze of each kind, generating the
+    ones missing from a directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for kind in KINDS:
+        filename = os.path.join(directory, f"{kind}-{size}.txt")
+        if not os.path.exists(filename):
+            write_maze(filename, *generate(size, size, kind, seed=seed))
+        files.append(filename)
+    return files
+
+
+def benchmark_strategy(filename, strategy, heuristic="manhattan"):
+    """
+    Solves a maze once while tracing allocations, for the peak memory, and
+    once untraced, for the time, each time on a freshly loaded maze.
+    """
+    # The traced run also builds what a strategy caches on disk, such as
+    # the corridor graph, outside of the timed run
+    m = Maze(filename)
+    try:
+        peak = peak_memory(m.solve, strategy, heuristic)
+    except Exception as e:
+        return {"error": str(e)}
+    m = Maze(filename)
+    m.solve(strategy, heuristic)
+    return {
+        "length": len(m.solution[0]),
+        "explored": m.num_explored,
+        "seconds": m.solve_time,
+        "peak_bytes": peak,
+        "fallback": m.fallback
+    }
+
+
+def benchmark_maze(filename, strategies=None, heuristic="manhattan"):
+    """
+    Returns the loading measures of a maze and the measures of each
+    strategy on it. By default every strategy runs, except slow strategies
+    on mazes too large for them.
+    """
+    m, load_time = timed(Maze, filename)
+    loading = {
+        "height": m.height,
+        "width": m.width,
+        "load_seconds": load_time,
+        "load_peak_bytes": peak_memory(Maze, filename)
+    }
+    del m
+    if strategies is None:
+        cells = loading["height"] * loading["width"]
+        strategies = [
+            strategy for strategy in STRATEGY_NAMES
+            if cells <= SLOW_STRATEGIES.get(strategy, cells)
+        ]
+    results = {}
+    for strategy in strategies:
+        results[strategy] = benchmark_strategy(filename, strategy, heuristic)
+    return {"loading": loading, "strategies": results}
+
+
+def compare(result, base):
+    """
+    Returns how a strategy result compares with the same result of a
+    baseline run: its time ratio and whether it explored other states.
+    """
+    if base is None or "error" in result or "error" in base:
+        return ""
+    note = f"{result['seconds'] / max(base['seconds'], 1e-9):>7.2f}x"
+    if result["explored"] != base["explored"] or result["length"] != base["length"]:
+        note += f"  (was {base['length']} long, {base['explored']} explored)"
+    return note
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the maze solver strategies.")
+    parser.add_argument("paths", nargs="*", metavar="PATH",
+                        help="maze files, directories or glob patterns (default: generated suite)")
+    parser.add_argument("--size", type=int, default=SUITE_SIZE, help="side of the generated mazes")
+    parser.add_argument("--directory", default=SUITE_DIRECTORY, help="where to generate the suite")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGY_NAMES,
+                        help="strategies to benchmark (default: all, but slow ones only on small mazes)")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="manhattan")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare with the results of an earlier --json run")
+    args = parser.parse_args()
+
+    try:
+        files = maze_files(args.paths) if args.paths else suite(args.directory, args.size)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    for filename in files:
+        result = benchmark_maze(filename, args.strategies, args.heuristic)
+        results[filename] = result
+        loading = result["loading"]
+        print(f"{filename}: {loading['height']}x{loading['width']}, "
+              f"loaded in {loading['load_seconds'] * 1000:.1f}ms "
+              f"(peak {loading['load_peak_bytes'] / 2 ** 20:.1f} MiB)")
+        print(f"{'strategy':<12}{'length':>8}{'explored':>10}{'time ms':>10}{'peak MiB':>10}"
+              f"{'  vs baseline' if baseline else ''}")
+        base = baseline.get(filename, {}).get("strategies", {})
+        for strategy, stats in result["strategies"].items():
+            if "error" in stats:
+                print(f"{strategy:<12}  {stats['error']}")
+                continue
+            note = compare(stats, base.get(strategy))
+            if stats["fallback"]:
+                note += f"  ({stats['fallback']})"
+            print(f"{strategy:<12}{stats['length']:>8}{stats['explored']:>10}"
+                  f"{stats['seconds'] * 1000:>10.2f}{stats['peak_bytes'] / 2 ** 20:>10.1f}"
+                  f"  {note}".rstrip())
+        print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Corridor compression of mazes.
+
+Dead ends are filled first: an open cell with a single open neighbor,
+other than the start and the goal, cannot be on a solution, so it is
+turned into a wall, which may make its neighbor a dead end too. The cells
+left with exactly two open neighbors are corridor cells. Every other cell,
+and the start and the goal, is a node of a weighted graph whose edges are
+the corridors between two nodes, weighted by their length in steps.
+
+The graph of a maze file is cached next to it, in a .corridors.npz file
+recording the size and modification time of the maze file, and rebuilt
+when the maze file changes.
+"""
+
+import io
+import os
+
+import numpy as np
+
+from moves import DOWN, LEFT, OPPOSITE, RIGHT, UP, move_steps
+
+
+CACHE_SUFFIX = ".corridors.npz"
+
+# Number of open moves of each move mask
+DEGREES = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.uint8)
+
+
+class CorridorGraph():
+    """
+    Weighted graph of the junctions, dead ends, start and goal of a maze
+    left after filling its dead ends. Nodes are cell IDs in increasing
+    order; the edges of node i are offsets[i]:offsets[i + 1] in targets
+    (node numbers), weights (corridor lengths) and bits (first move).
+    """
+
+    def __init__(self, filled, nodes, offsets, targets, weights, bits):
+        self.filled = filled
+        self.nodes = nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.bits = bits
+
+    @classmethod
+    def build(cls, walls, masks, start, goal):
+        """
+        Builds the graph of a maze from its walls, the flat move masks of
+        its cells, and the cell IDs of its start and goal.
+        """
+        width = walls.shape[1]
+        steps = move_steps(width)
+        masks = bytearray(masks)
+        degrees = bytearray(DEGREES[np.frombuffer(masks, dtype=np.uint8)])
+        filled = np.zeros(walls.size, dtype=bool)
+
+        # Fill dead ends, following each filled corridor to its junction
+        stack = np.flatnonzero(np.frombuffer(degrees, dtype=np.uint8) == 1).tolist()
+        while stack:
+            cell = stack.pop()
+            if cell == start or cell == goal or degrees[cell] != 1:
+                continue
+            bit = masks[cell]
+            neighbor = cell + steps[bit]
+            filled[cell] = True
+            masks[cell] = degrees[cell] = 0
+            masks[neighbor] &= ~OPPOSITE[bit]
+            degrees[neighbor] -= 1
+            if degrees[neighbor] == 1:
+                stack.append(neighbor)
+
+        # Nodes: open cells not in the middle of a corridor
+        degree_of = np.frombuffer(degrees, dtype=np.uint8)
+        is_node = (degree_of != 2) & (degree_of > 0)
+        is_node[[start, goal]] = True
+        nodes = np.flatnonzero(is_node)
+        node_number = {cell: i for i, cell in enumerate(nodes.tolist())}
+
+        # Walk every corridor from each of its ends
+        offsets, targets, weights, bits = [0], [], [], []
+        for cell in nodes.tolist():
+            for bit in (UP, DOWN, LEFT, RIGHT):
+                if not masks[cell] & bit:
+                    continue
+                end, length = walk(masks, steps, node_number, cell, bit)
+                targets.append(node_number[end])
+                weights.append(length)
+                bits.append(bit)
+            offsets.append(len(targets))
+
+        return cls(
+            filled, nodes,
+            np.array(offsets, dtype=np.int64),
+            np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.int64),
+            np.array(bits, dtype=np.uint8)
+        )
+
+    def node_number(self, cell):
+        return int(np.searchsorted(self.nodes, cell))
+
+    def edges(self, node):
+        """
+        Returns the (target node, weight, first move bit) edges of a node.
+        """
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(
+            self.targets[start:end].tolist(),
+            self.weights[start:end].tolist(),
+            self.bits[start:end].tolist()
+        )
+
+    def save(self, file, stamp):
+        np.savez(
+            file, stamp=np.array(stamp, dtype=np.int64),
+            filled=np.packbits(self.filled), size=self.filled.size,
+            nodes=self.nodes, offsets=self.offsets, targets=self.targets,
+            weights=self.weights, bits=self.bits
+        )
+
+    @classmethod
+    def load(cls, file, stamp):
+        """
+        Returns the graph saved in a file, or None if it was saved for
+        another version of the maze file.
+        """
+        with np.load(file) as data:
+            if data["stamp"].tolist() != list(stamp):
+                return None
+            filled = np.unpackbits(data["filled"], count=int(data["size"])).astype(bool)
+            return cls(
+                filled, data["nodes"], data["offsets"], data["targets"],
+                data["weights"], data["bits"]
+            )
+
+
+def walk(masks, steps, node_number, cell, bit):
+    """
+    Follows a corridor from a node in the direction of a move bit, and
+    returns (node reached, number of steps).
+    """
+    cell += steps[bit]
+    length = 1
+    while cell not in node_number:
+        bit = masks[cell] & ~OPPOSITE[bit]
+        cell += steps[bit]
+        length += 1
+    return cell, length
+
+
+def corridor_cells(masks, width, cell, bit, length):
+    """
+    Yields the (move bit, cell ID) steps along a corridor of `length` steps
+    from a node, starting in the direction of a move bit.
+    """
+    steps = move_steps(width)
+    for i in range(length):
+        if i:
+            bit = masks[cell] & ~OPPOSITE[bit]
+        cell += steps[bit]
+        yield bit, cell
+
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+
+def source_stamp(filename):
+    stat = os.stat(filename)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def corridor_graph(filename, walls, masks, start, goal):
+    """
+    Returns the corridor graph of a maze file from its cache when it is up
+    to date, building and caching it otherwise.
+    """
+    stamp = source_stamp(filename)
+    path = cache_path(filename)
+    try:
+        graph = CorridorGraph.load(path, stamp)
+        if graph is not None:
+            return graph
+    except (OSError, ValueError, KeyError):
+        pass
+
+    graph = CorridorGraph.build(walls, masks, start, goal)
+    buffer = io.BytesIO()
+    graph.save(buffer, stamp)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(temporary, path)
+    except OSError:
+        # Read-only maze directory: keep running without a cache
+        pass
+    return graph
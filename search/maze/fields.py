@@ -0,0 +1,170 @@
+"""
+Distance fields for answering many queries on the same maze.
+
+A distance field is a breadth-first search from one cell over its whole
+region: for every cell, its distance to that cell and the move leading one
+step closer to it. The path from any cell is then read in O(path length)
+by following the moves. Fields are kept in an LRU cache bounded by their
+total size in bytes.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from moves import OPPOSITE, move_steps
+
+
+# Size of the field cache of a Maze, in bytes
+FIELD_CACHE_BYTES = 256 * 2 ** 20
+
+# Layers of fewer cells are expanded one cell at a time rather than with
+# array operations, which cost more than they save on small layers
+SMALL_LAYER = 64
+
+
+class DistanceField():
+    """
+    Distances to a cell, -1 for cells it cannot reach, and the move bit
+    leading from each reached cell one step closer to it.
+    """
+
+    def __init__(self, cell, distances, moves):
+        self.cell = cell
+        self.distances = distances
+        self.moves = moves
+
+    @classmethod
+    def build(cls, masks, width, cell):
+        """
+        Runs a breadth-first search from a cell over the flat move masks of
+        a maze.
+        """
+        distances = np.full(len(masks), -1, dtype=np.int32)
+        moves = np.zeros(len(masks), dtype=np.uint8)
+        steps = move_steps(width)
+        distances[cell] = 0
+
+        # Memoryviews index faster than arrays one cell at a time
+        views = (memoryview(masks), steps, memoryview(distances), memoryview(moves))
+        layer = [cell]
+        depth = 0
+        while len(layer):
+            depth += 1
+            if len(layer) < SMALL_LAYER:
+                if isinstance(layer, np.ndarray):
+                    layer = layer.tolist()
+                layer = expand_cells(*views, layer, depth)
+            else:
+                layer = expand_layer(masks, steps, distances, moves, np.asarray(layer), depth)
+        return cls(cell, distances, moves)
+
+    def distance(self, cell):
+        """
+        Returns the number of steps between a cell and the field's cell, or
+        None if they are not connected.
+        """
+        distance = int(self.distances[cell])
+        return distance if distance != -1 else None
+
+    def steps_from(self, cell, width):
+        """
+        Returns the (move bit, cell) steps from a cell to the field's cell,
+        or None if they are not connected.
+        """
+        if self.distances[cell] == -1:
+            return None
+        offsets = move_steps(width)
+        moves = memoryview(self.moves)
+        steps = []
+        while cell != self.cell:
+            bit = moves[cell]
+            cell += offsets[bit]
+            steps.append((bit, cell))
+        return steps
+
+    def nbytes(self):
+        return self.distances.nbytes + self.moves.nbytes
+
+
+def expand_cells(masks, steps, distances, moves, layer, depth):
+    """
+    Expands a small layer cell by cell and returns the next layer.
+    """
+    next_layer = []
+    for cell in layer:
+        mask = masks[cell]
+        for bit, step in steps.items():
+            if mask & bit:
+                neighbor = cell + step
+                if distances[neighbor] == -1:
+                    distances[neighbor] = depth
+                    moves[neighbor] = OPPOSITE[bit]
+                    next_layer.append(neighbor)
+    return next_layer
+
+
+def expand_layer(masks, steps, distances, moves, layer, depth):
+    """
+    Expands a large layer one direction at a time with array operations
+    and returns the next layer.
+    """
+    layer_masks = masks[layer]
+    reached = []
+    for bit, step in steps.items():
+        neighbors = layer[(layer_masks & bit) != 0] + step
+        neighbors = neighbors[distances[neighbors] == -1]
+        distances[neighbors] = depth
+        moves[neighbors] = OPPOSITE[bit]
+        reached.append(neighbors)
+    return np.concatenate(reached)
+
+
+class FieldCache():
+    """
+    Distance fields by cell, evicting the least recently used ones while
+    their total size exceeds `capacity` bytes.
+    """
+
+    def __init__(self, capacity=FIELD_CACHE_BYTES):
+        self.capacity = capacity
+        self.fields = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, cell):
+        return cell in self.fields
+
+    def get(self, cell):
+        """
+        Returns the field of a cell and marks it as recently used, or None.
+        """
+        field = self.fields.get(cell)
+        if field is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.fields.move_to_end(cell)
+        return field
+
+    def put(self, field):
+        """
+        Caches a field, unless it alone exceeds the capacity.
+        """
+        if field.nbytes() > self.capacity:
+            return
+        if field.cell in self.fields:
+            self.nbytes -= self.fields.pop(field.cell).nbytes()
+        self.fields[field.cell] = field
+        self.nbytes += field.nbytes()
+        while self.nbytes > self.capacity:
+            _, evicted = self.fields.popitem(last=False)
+            self.nbytes -= evicted.nbytes()
+
+    def clear(self):
+        self.fields.clear()
+        self.nbytes = 0
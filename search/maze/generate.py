@@ -0,0 +1,227 @@
+"""
+Maze generator.
+
+Writes mazes in the text format of maze.py (█ for walls, spaces for open
+cells, A and B for the start and the goal) of up to 10,000 x 10,000
+characters. Three kinds of mazes can be made:
+
+- backtracker: a perfect maze (exactly one path between any two cells) of
+  long winding corridors, carved by a randomized depth-first search.
+- prim: a perfect maze of short branching dead ends, carved by randomized
+  Prim's algorithm.
+- rooms: open rooms separated by walls, joined by doors along a random
+  backtracker tree plus a fraction of extra doors, so there are loops.
+
+The start is in the top-left cell and the goal in the bottom-right one.
+
+Usage: python generate.py FILE HEIGHT WIDTH [--kind K] [--room N] [--loops P] [--seed S]
+"""
+
+import argparse
+import random
+from array import array
+
+import numpy as np
+
+from moves import DOWN, LEFT, OPPOSITE, RIGHT, UP
+
+
+KINDS = ("backtracker", "prim", "rooms")
+
+# Largest maze written, in characters per side
+MAX_SIZE = 10000
+
+# Default width of the rooms of a rooms maze, and share of extra doors
+ROOM_SIZE = 15
+LOOPS = 0.1
+
+# UTF-8 bytes of each character, padded with zeros to the same length
+WALL_CHAR, OPEN_CHAR, START_CHAR, GOAL_CHAR = range(4)
+CHAR_BYTES = np.array([
+    list("█".encode()), [ord(" "), 0, 0], [ord("A"), 0, 0], [ord("B"), 0, 0]
+], dtype=np.uint8)
+
+# Rows encoded at once when writing a maze
+WRITE_ROWS = 1024
+
+
+def neighbor_cells(cell, height, width):
+    """
+    Returns the (move bit, cell) neighbors of a cell of a height x width
+    grid of flat cell IDs.
+    """
+    neighbors = []
+    if cell >= width:
+        neighbors.append((UP, cell - width))
+    if cell < (height - 1) * width:
+        neighbors.append((DOWN, cell + width))
+    if cell % width:
+        neighbors.append((LEFT, cell - 1))
+    if (cell + 1) % width:
+        neighbors.append((RIGHT, cell + 1))
+    return neighbors
+
+
+def backtracker(height, width, rng):
+    """
+    Builds a random spanning tree of a height x width grid with an
+    iterative randomized depth-first search. Returns a bytearray of the move
+    bit from every cell to its parent in the tree (0 for the root).
+    """
+    links = bytearray(height * width)
+    visited = bytearray(height * width)
+    visited[0] = 1
+    # An array keeps the stack small on mazes with paths of millions of cells
+    stack = array("i", [0])
+    while stack:
+        cell = stack[-1]
+        options = [
+            (bit, neighbor) for bit, neighbor in neighbor_cells(cell, height, width)
+            if not visited[neighbor]
+        ]
+        if not options:
+            stack.pop()
+            continue
+        bit, neighbor = options[int(rng.random() * len(options))]
+        visited[neighbor] = 1
+        links[neighbor] = OPPOSITE[bit]
+        stack.append(neighbor)
+    return links
+
+
+def prim(height, width, rng):
+    """
+    Builds a random spanning tree of a height x width grid with randomized
+    Prim's algorithm: a random frontier cell is joined to a random
+    neighbor already in the tree. Returns the same links as backtracker().
+    """
+    links = bytearray(height * width)
+    # 0: not reached, 1: in the frontier, 2: in the tree
+    state = bytearray(height * width)
+    state[0] = 2
+    frontier = []
+    for _, neighbor in neighbor_cells(0, height, width):
+        state[neighbor] = 1
+        frontier.append(neighbor)
+
+    while frontier:
+        # Remove a random cell by swapping it with the last one
+        i = int(rng.random() * len(frontier))
+        cell = frontier[i]
+        frontier[i] = frontier[-1]
+        frontier.pop()
+
+        neighbors = neighbor_cells(cell, height, width)
+        joined = [bit for bit, neighbor in neighbors if state[neighbor] == 2]
+        links[cell] = joined[int(rng.random() * len(joined))]
+        state[cell] = 2
+        for _, neighbor in neighbors:
+            if not state[neighbor]:
+                state[neighbor] = 1
+                frontier.append(neighbor)
+    return links
+
+
+def carve(walls, links, height, width, room=1, doors=0):
+    """
+    Opens the cells of a height x width grid laid out in a wall grid, each
+    `room` characters wide and separated by one wall from (1, 1), and the
+    wall between each cell and the cells its links lead to. `doors` is the
+    place of the opening along the wall, for each cell or for all of them.
+    """
+    step = room + 1
+    bottom, right = height * step, width * step
+    for offset in range(room):
+        walls[1 + offset:bottom:step, 1:right] = False
+    walls[1:bottom, step::step] = True
+
+    links = np.frombuffer(links, dtype=np.uint8).reshape(height, width)
+    for bit, dr, dc in ((UP, -1, 0), (DOWN, 1, 0), (LEFT, 0, -1), (RIGHT, 0, 1)):
+        rows, cols = np.nonzero(links & bit)
+        door = doors if np.isscalar(doors) else doors[rows, cols]
+        # The wall is the row or column after the cell's room, or before it
+        r = 1 + rows * step + (room if dr > 0 else -1 if dr < 0 else door)
+        c = 1 + cols * step + (room if dc > 0 else -1 if dc < 0 else door)
+        walls[r, c] = False
+
+
+def generate(height, width, kind="backtracker", room=ROOM_SIZE, loops=LOOPS, seed=0):
+    """
+    Returns (walls, start, goal) of a random maze of height x width
+    characters, as loaded by maze.py.
+    """
+    if not 3 <= height <= MAX_SIZE or not 3 <= width <= MAX_SIZE:
+        raise ValueError(f"maze sides must be between 3 and {MAX_SIZE}")
+    if kind not in KINDS:
+        raise ValueError(f"unknown maze kind: {kind}")
+    rng = random.Random(seed)
+    walls = np.ones((height, width), dtype=bool)
+
+    if kind == "rooms":
+        room = max(1, min(room, height - 2, width - 2))
+        step = room + 1
+        rooms_high, rooms_wide = (height - 1) // step, (width - 1) // step
+        links = backtracker(rooms_high, rooms_wide, rng)
+        # Extra doors towards the room below or to the right
+        for cell in range(rooms_high * rooms_wide):
+            for bit, _ in neighbor_cells(cell, rooms_high, rooms_wide):
+                if bit in (DOWN, RIGHT) and rng.random() < loops:
+                    links[cell] |= bit
+        doors = np.random.default_rng(seed).integers(0, room, size=(rooms_high, rooms_wide))
+        carve(walls, links, rooms_high, rooms_wide, room, doors)
+        bottom, right = rooms_high * step - 1, rooms_wide * step - 1
+    else:
+        cells_high, cells_wide = (height - 1) // 2, (width - 1) // 2
+        links = (backtracker if kind == "backtracker" else prim)(cells_high, cells_wide, rng)
+        carve(walls, links, cells_high, cells_wide)
+        bottom, right = cells_high * 2 - 1, cells_wide * 2 - 1
+
+    if (bottom, right) == (1, 1):
+        raise ValueError("maze too small to hold a start and a goal")
+    return walls, (1, 1), (bottom, right)
+
+
+def write_maze(filename, walls, start, goal):
+    """
+    Writes a maze in the text format of maze.py, encoding WRITE_ROWS rows
+    at once with a lookup table of the bytes of each character.
+    """
+    chars = np.where(walls, np.uint8(WALL_CHAR), np.uint8(OPEN_CHAR))
+    chars[start] = START_CHAR
+    chars[goal] = GOAL_CHAR
+    newline = np.zeros((1, 3), dtype=np.uint8)
+    newline[0, 0] = ord("\n")
+
+    with open(filename, "wb") as f:
+        for first in range(0, len(chars), WRITE_ROWS):
+            rows = CHAR_BYTES[chars[first:first + WRITE_ROWS]]
+            rows = np.concatenate(
+                (rows, np.broadcast_to(newline, (len(rows), 1, 3))), axis=1
+            )
+            f.write(rows[rows != 0].tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a random maze file.")
+    parser.add_argument("file")
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int)
+    parser.add_argument("--kind", choices=KINDS, default="backtracker")
+    parser.add_argument("--room", type=int, default=ROOM_SIZE, help="room width of rooms mazes")
+    parser.add_argument("--loops", type=float, default=LOOPS,
+                        help="share of extra doors of rooms mazes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        walls, start, goal = generate(
+            args.height, args.width, args.kind, args.room, args.loops, args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    write_maze(args.file, walls, start, goal)
+    print(f"Wrote a {args.height}x{args.width} {args.kind} maze to {args.file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,242 @@
+import argparse
+import heapq
+import math
+import mmap
+import os
 import sys
+import time
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
-
-
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
-
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
+import numpy as np
+
+# The nodes and frontiers are shared with the other search projects
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corridors import corridor_cells, corridor_graph
+from fields import DistanceField, FieldCache
+from frontier import Node, PriorityFrontier, QueueFrontier, StackFrontier
+from moves import ACTIONS, DOWN, LEFT, MOVES, OPPOSITE, RIGHT, UP, move_steps
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def octile(a, b):
+    dr, dc = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(dr, dc) + (math.sqrt(2) - 1) * min(dr, dc)
+
+
+# Heuristics estimating the number of steps between two cells
+HEURISTICS = {
+    "manhattan": manhattan,
+    "octile": octile
+}
+
+# Frontier strategies: the frontier of uninformed searches, or how informed
+# searches rank a node from its path cost g and its heuristic value h
+STRATEGIES = {
+    "dfs": StackFrontier,
+    "bfs": QueueFrontier,
+    "dijkstra": lambda g, h: (g,),
+    "greedy": lambda g, h: (h,),
+    "astar": lambda g, h: (g + h, h)
+}
+
+# Strategies with a solver method of their own, given a heuristic
+SOLVERS = {
+    "jps": "solve_jump_points",
+    "corridors": "solve_corridors",
+    "idastar": "solve_ida",
+    "beam": "solve_beam"
+}
+
+# Every strategy accepted by Maze.solve
+STRATEGY_NAMES = (*STRATEGIES, *SOLVERS)
+
+# Palette of output_image, and the index of each kind of cell in it
+PALETTE = [
+    (0, 0, 0), (40, 40, 40), (255, 0, 0), (0, 171, 28),
+    (220, 235, 113), (212, 97, 85), (237, 240, 252)
+]
+BACKGROUND, WALL, START, GOAL, SOLUTION, EXPLORED, EMPTY = range(len(PALETTE))
+
+# Pixels per cell of output_image, unless the image would get larger than
+# Pillow opens without a decompression bomb warning
+DEFAULT_CELL_SIZE = 50
+MAX_IMAGE_PIXELS = 2 ** 26
+
+# Default memory ceiling of the idastar and beam strategies, and the
+# estimated size of one entry of their transposition table, path or beam
+SEARCH_MEMORY_BYTES = 256 * 2 ** 20
+ENTRY_BYTES = 192
+
+# Lookup table of the bytes read as walls: any character but A, B and space
+WALL_BYTES = np.ones(256, dtype=bool)
+WALL_BYTES[list(b" AB")] = False
+
+
+class Bitmap():
+    """
+    Set of cell IDs stored as one bit per cell.
+    """
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, cell):
+        return self.bits[cell >> 3] >> (cell & 7) & 1
+
+    def add(self, cell):
+        byte, bit = cell >> 3, 1 << (cell & 7)
+        if not self.bits[byte] & bit:
+            self.bits[byte] |= bit
+            self.count += 1
+
+    def to_array(self, shape):
+        """
+        Returns the set as a NumPy bool array of the given shape.
+        """
+        size = shape[0] * shape[1]
+        bits = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), bitorder="little")
+        return bits[:size].astype(bool).reshape(shape)
+
+
+def move_masks(walls):
+    """
+    Returns the flat uint8 array of the move mask of every cell: the bits of
+    the moves leading from the cell to an open cell inside the maze.
+    """
+    open_cells = (~walls).view(np.uint8)
+    masks = np.zeros(walls.shape, dtype=np.uint8)
+    masks[1:, :] |= open_cells[:-1, :]
+    masks[:-1, :] |= open_cells[1:, :] << 1
+    masks[:, 1:] |= open_cells[:, :-1] << 2
+    masks[:, :-1] |= open_cells[:, 1:] << 3
+    masks *= open_cells
+    return masks.reshape(-1)
+
+
+def read_characters(filename):
+    """
+    Memory-maps a UTF-8 maze file, checks it has exactly one A and one B
+    with byte searches, and returns a uint8 array of its characters: the
+    UTF-8 continuation bytes are dropped, so every multi-byte character
+    (such as a wall) is left as its lead byte.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Exception("maze must have exactly one start point")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for char, name in ((b"A", "start point"), (b"B", "goal")):
+                first = buffer.find(char)
+                if first == -1 or buffer.find(char, first + 1) != -1:
+                    raise Exception(f"maze must have exactly one {name}")
+            data = np.frombuffer(buffer, dtype=np.uint8)
+            chars = data[(data & 0xC0) != 0x80]
+            del data
+    return chars
+
+
+def load_walls(filename):
+    """
+    Returns (walls, start, goal) of a maze file. Rows are converted to the
+    wall grid with a lookup table over all characters at once, rather than
+    character by character. Short lines are padded with open cells.
+    """
+    chars = read_characters(filename)
+
+    # Line breaks are "\n", "\r\n" or a lone "\r"
+    crlf = np.flatnonzero((chars[:-1] == ord("\r")) & (chars[1:] == ord("\n")))
+    if len(crlf):
+        chars = np.delete(chars, crlf)
+    breaks = (chars == ord("\n")) | (chars == ord("\r"))
+    ends = np.flatnonzero(breaks)
+    if not breaks[-1]:
+        ends = np.append(ends, len(chars))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    height, width = len(ends), int(lengths.max())
+
+    cells = WALL_BYTES[chars[~breaks]]
+    if (lengths == width).all():
+        walls = cells.reshape(height, width)
+    else:
+        walls = np.zeros((height, width), dtype=bool)
+        offset = 0
+        for i, length in enumerate(lengths.tolist()):
+            walls[i, :length] = cells[offset:offset + length]
+            offset += length
+
+    def position(char):
+        i = int(np.flatnonzero(chars == ord(char))[0])
+        row = int(np.searchsorted(ends, i))
+        return (row, i - int(starts[row]))
+
+    return walls, position("A"), position("B")
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
 
+class Maze():
 
-class QueueFrontier(StackFrontier):
+    def __init__(self, filename):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+        # Read the walls, as a NumPy bool array, and the start and goal
+        self.filename = filename
+        self.walls, self.start, self.goal = load_walls(filename)
+        self.height, self.width = self.walls.shape
 
-class Maze():
+        self.init_moves()
+        self.solution = None
+        self.explored = None
+
+        # Corridor graph and move masks with dead ends filled, on first use
+        self.corridors = None
+        self.corridor_masks = None
+
+        # Distance fields of the cells queried by path(), by cell ID
+        self.fields = FieldCache()
+
+        # Memory ceiling of the idastar and beam strategies, in bytes, and
+        # why the last solution may not be the shortest if they fell back
+        self.memory_limit = SEARCH_MEMORY_BYTES
+        self.fallback = None
+
+
+    def init_moves(self):
+        """
+        Computes the move mask of every cell from the walls, and the
+        (action, cell ID offset) moves allowed by each mask.
+        """
+        self.masks = move_masks(self.walls)
+        self.mask_of = memoryview(self.masks)
+        offsets = move_steps(self.width)
+        self.moves = [
+            [(action, offsets[bit]) for action, bit in MOVES if mask & bit]
+            for mask in range(16)
+        ]
 
-    def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+    def cell(self, state):
+        """
+        Returns the flat cell ID of a (row, col) state.
+        """
+        return state[0] * self.width + state[1]
 
-        # Validate start and goal
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
-
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
 
-        self.solution = None
+    def state(self, cell):
+        """
+        Returns the (row, col) state of a flat cell ID.
+        """
+        return divmod(cell, self.width)
 
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
+        for i, row in enumerate(self.walls.tolist()):
             for j, col in enumerate(row):
                 if col:
                     print("█", end="")
@@ -101,34 +253,55 @@ class Maze():
 
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        cell = self.cell(state)
+        return [
+            (action, self.state(cell + offset))
+            for action, offset in self.moves[self.mask_of[cell]]
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
 
-
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def cell_neighbors(self, cell):
+        """
+        Returns the (action, cell ID) moves from a cell ID to open cells.
+        """
+        return [(action, cell + offset) for action, offset in self.moves[self.mask_of[cell]]]
+
+
+    def solve(self, strategy="dfs", heuristic="manhattan"):
+        """
+        Finds a solution to maze, if one exists, with a strategy of
+        STRATEGY_NAMES and, for the informed ones, a heuristic of
+        HEURISTICS. Records the number of states explored and the time
+        taken in num_explored and solve_time. The idastar and beam
+        strategies stay within memory_limit bytes and, when that forces
+        them to settle for a path that may not be the shortest, record why
+        in fallback.
+        """
+        start_time = time.perf_counter()
+        self.fallback = None
+        try:
+            if strategy in SOLVERS:
+                getattr(self, SOLVERS[strategy])(HEURISTICS[heuristic])
+            elif strategy in ("dfs", "bfs"):
+                self.solve_uninformed(STRATEGIES[strategy]())
+            else:
+                self.solve_informed(STRATEGIES[strategy], HEURISTICS[heuristic])
+        finally:
+            self.solve_time = time.perf_counter() - start_time
+
+
+    def solve_uninformed(self, frontier):
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        start = Node(state=self.cell(self.start), parent=None, action=None)
         frontier.add(start)
+        goal = self.cell(self.goal)
 
         # Initialize an empty explored set
-        self.explored = set()
+        self.explored = Bitmap(self.height * self.width)
 
         # Keep looping until solution found
         while True:
@@ -142,88 +315,597 @@ class Maze():
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+            if node.state == goal:
+                self.solution = self.backtrack(node)
                 return
 
             # Mark node as explored
             self.explored.add(node.state)
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
+            for action, state in self.cell_neighbors(node.state):
                 if not frontier.contains_state(state) and state not in self.explored:
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
+    def solve_informed(self, rank, heuristic):
+        """
+        Best-first search removing from a priority frontier the node of
+        lowest rank(path cost, heuristic value) first. Reaching a state
+        again by a cheaper path replaces its node in the frontier.
+        """
+        self.num_explored = 0
+        self.explored = Bitmap(self.height * self.width)
+        goal = self.cell(self.goal)
+
+        start = Node(state=self.cell(self.start), parent=None, action=None, cost=0)
+        frontier = PriorityFrontier()
+        frontier.add(start, rank(0, heuristic(self.start, self.goal)))
+
+        while not frontier.empty():
+            node = frontier.remove()
+            self.num_explored += 1
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
+            if node.state == goal:
+                self.solution = self.backtrack(node)
+                return
+
+            self.explored.add(node.state)
+
+            for action, state in self.cell_neighbors(node.state):
+                if state not in self.explored:
+                    child = Node(state=state, parent=node, action=action, cost=node.cost + 1)
+                    h = heuristic(self.state(state), self.goal)
+                    frontier.add(child, rank(child.cost, h))
+
+        raise Exception("no solution")
+
+
+    def jump_horizontal(self, cell, bit, step):
+        """
+        Moves from a cell in a horizontal direction until reaching the goal
+        or a cell with a forced vertical neighbor: an open cell above (or
+        below) it while the cell above (or below) the previous one is
+        blocked. Returns that jump point, or None at a wall.
+        """
+        mask_of, goal = self.mask_of, self.goal_cell
+        while mask_of[cell] & bit:
+            cell += step
+            if cell == goal:
+                return cell
+            mask, behind = mask_of[cell], mask_of[cell - step]
+            if mask & ~behind & (UP | DOWN):
+                return cell
+        return None
+
+
+    def jump_vertical(self, cell, bit, step):
+        """
+        Moves from a cell in a vertical direction until reaching the goal or
+        a cell from which a horizontal jump finds a jump point. Returns that
+        jump point, or None at a wall.
+        """
+        mask_of, goal = self.mask_of, self.goal_cell
+        while mask_of[cell] & bit:
+            cell += step
+            if cell == goal:
+                return cell
+            if (self.jump_horizontal(cell, LEFT, -1) is not None
+                    or self.jump_horizontal(cell, RIGHT, 1) is not None):
+                return cell
+        return None
+
+
+    def jump_directions(self, cell, action):
+        """
+        Returns the directions to jump in from a jump point reached by an
+        action: all of them from the start, the same direction and forced
+        vertical ones after a horizontal move, and the same direction and
+        both horizontal ones after a vertical move.
+        """
+        if action is None:
+            return ("up", "down", "left", "right")
+        if action in ("up", "down"):
+            return (action, "left", "right")
+        step = -1 if action == "left" else 1
+        forced = self.mask_of[cell] & ~self.mask_of[cell - step]
+        return (action,) + tuple(
+            direction for direction, bit in (("up", UP), ("down", DOWN)) if forced & bit
         )
-        draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
+    def solve_jump_points(self, heuristic):
+        """
+        Jump point search: A* over jump points only. Straight runs of cells
+        that are part of symmetric shortest paths are skipped by jumping
+        until a jump point, so open rooms are crossed without expanding each
+        of their cells. The solution is filled back in cell by cell.
+        """
+        self.num_explored = 0
+        self.explored = Bitmap(self.height * self.width)
+        self.goal_cell = self.cell(self.goal)
+        steps = move_steps(self.width)
+        jumps = {
+            "up": (self.jump_vertical, UP, steps[UP]),
+            "down": (self.jump_vertical, DOWN, steps[DOWN]),
+            "left": (self.jump_horizontal, LEFT, steps[LEFT]),
+            "right": (self.jump_horizontal, RIGHT, steps[RIGHT])
+        }
+
+        start = Node(state=self.cell(self.start), parent=None, action=None, cost=0)
+        frontier = PriorityFrontier()
+        frontier.add(start, (heuristic(self.start, self.goal), 0))
+
+        while not frontier.empty():
+            node = frontier.remove()
+            self.num_explored += 1
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+            if node.state == self.goal_cell:
+                self.solution = self.fill_jumps(node)
+                return
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+            self.explored.add(node.state)
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            for direction in self.jump_directions(node.state, node.action):
+                jump, bit, step = jumps[direction]
+                state = jump(node.state, bit, step)
+                if state is None or state in self.explored:
+                    continue
+                cost = node.cost + abs(state - node.state) // abs(step)
+                child = Node(state=state, parent=node, action=direction, cost=cost)
+                h = heuristic(self.state(state), self.goal)
+                frontier.add(child, (cost + h, h))
+
+        raise Exception("no solution")
+
+
+    def fill_jumps(self, node):
+        """
+        Returns the (actions, cells) solution leading to a goal node of a
+        jump point search, with every cell between two jump points.
+        """
+        steps = move_steps(self.width)
+        offsets = {action: steps[bit] for action, bit in MOVES}
+        actions = []
+        cells = []
+        while node.parent is not None:
+            step = offsets[node.action]
+            for cell in range(node.state, node.parent.state, -step):
+                actions.append(node.action)
+                cells.append(self.state(cell))
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def solve_corridors(self, heuristic):
+        """
+        A* search on the corridor graph of the maze (see corridors.py), whose
+        nodes are its junctions, dead ends, start and goal once dead ends
+        are filled, and whose edges are the corridors between them. The
+        graph is loaded from the cache of the maze file, or built and cached
+        on first use. The solution is expanded back to cells.
+        """
+        if self.corridors is None:
+            self.corridors = corridor_graph(
+                self.filename, self.walls, self.masks,
+                self.cell(self.start), self.cell(self.goal)
+            )
+            filled = self.corridors.filled.reshape(self.walls.shape)
+            self.corridor_masks = memoryview(move_masks(self.walls | filled))
+        graph = self.corridors
+        cells = graph.nodes.tolist()
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        self.num_explored = 0
+        self.explored = Bitmap(self.height * self.width)
+        goal = graph.node_number(self.cell(self.goal))
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
+        start = Node(state=graph.node_number(self.cell(self.start)), parent=None, action=None, cost=0)
+        frontier = PriorityFrontier()
+        frontier.add(start, (heuristic(self.start, self.goal), 0))
 
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
+        while not frontier.empty():
+            node = frontier.remove()
+            self.num_explored += 1
 
-        img.save(filename)
+            if node.state == goal:
+                self.solution = self.expand_corridors(node)
+                return
 
+            self.explored.add(cells[node.state])
+
+            for target, weight, bit in graph.edges(node.state):
+                if cells[target] in self.explored:
+                    continue
+                cost = node.cost + weight
+                child = Node(state=target, parent=node, action=(bit, weight), cost=cost)
+                h = heuristic(self.state(cells[target]), self.goal)
+                frontier.add(child, (cost + h, h))
+
+        raise Exception("no solution")
+
+
+    def expand_corridors(self, node):
+        """
+        Returns the (actions, cells) solution leading to a goal node of a
+        corridor graph search, following each corridor cell by cell.
+        """
+        cells = self.corridors.nodes.tolist()
+        corridors = []
+        while node.parent is not None:
+            corridors.append((cells[node.parent.state], node.action))
+            node = node.parent
+
+        actions = []
+        path = []
+        for cell, (bit, length) in reversed(corridors):
+            for bit, cell in corridor_cells(self.corridor_masks, self.width, cell, bit, length):
+                actions.append(ACTIONS[bit])
+                path.append(self.state(cell))
+        return (actions, path)
+
+
+    def search_capacity(self):
+        """
+        Returns the number of entries the memory-bounded strategies may
+        store within memory_limit, besides their explored bitmap.
+        """
+        capacity = (self.memory_limit - (self.height * self.width + 7) // 8) // ENTRY_BYTES
+        if capacity < 1:
+            raise Exception("memory limit too small for this maze")
+        return capacity
+
+
+    def solve_ida(self, heuristic):
+        """
+        IDA*: depth-first searches of the paths whose cost plus heuristic
+        value is within a threshold, raising the threshold until one
+        reaches the goal. Only the current path and a transposition table
+        are kept: the smallest cost each cell was reached with, and in
+        which iteration, which cuts off paths reaching a cell again without
+        being shorter, cycles included. If they outgrow the memory limit,
+        the search falls back to a beam search.
+        """
+        self.num_explored = 0
+        self.explored = Bitmap(self.height * self.width)
+        capacity = self.search_capacity()
+        start, goal = self.cell(self.start), self.cell(self.goal)
+
+        table = {}
+        threshold = heuristic(self.start, self.goal)
+        step = 1
+        iteration = 0
+        while True:
+            iteration += 1
+            result = self.ida_iteration(start, goal, threshold, heuristic, table, iteration, capacity)
+            if result is None:
+                table.clear()
+                self.explored = Bitmap(self.height * self.width)
+                self.beam_search(heuristic, capacity)
+                if self.fallback:
+                    self.fallback = f"IDA* ran out of memory, then {self.fallback}"
+                return
+
+            path, exceeded = result
+            if path is not None:
+                self.solution = ([action for action, _ in path], [self.state(cell) for _, cell in path])
+                return
+            if exceeded is None:
+                raise Exception("no solution")
+
+            # Raise the threshold by a step doubled every iteration, rather
+            # than to the lowest cut off estimate, which in a maze is often
+            # a single step away: there are then a logarithmic number of
+            # iterations, and overshooting the length of the shortest path
+            # is harmless since the last iteration keeps searching for it
+            threshold = max(exceeded, threshold + step)
+            step *= 2
+
+
+    def ida_iteration(self, start, goal, threshold, heuristic, table, iteration, capacity):
+        """
+        Runs one IDA* iteration. A cell is expanded again only when reached
+        by a shorter path than before, or by an equally short one in a new
+        iteration, as its paths may then go further. Once the goal is
+        reached, the search goes on with the cost of that path as its
+        bound, so the path returned is the shortest one within the
+        threshold. Returns (path, exceeded): the (action, cell ID) steps of
+        the path or None, and the lowest cost plus heuristic value of the
+        paths cut off by the threshold, or None. Returns None if the table
+        and the path outgrow `capacity` entries.
+        """
+        def children(cell):
+            # Sorted so the child closest to the goal is popped first
+            return sorted(
+                self.cell_neighbors(cell),
+                key=lambda child: heuristic(self.state(child[1]), self.goal),
+                reverse=True
+            )
+
+        table[start] = (0, iteration)
+        path = []
+        stack = [children(start)]
+        found = None
+        bound = threshold
+        exceeded = None
+
+        while stack:
+            if not stack[-1]:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+
+            action, cell = stack[-1].pop()
+            g = len(path) + 1
+            f = g + heuristic(self.state(cell), self.goal)
+            if f > bound:
+                if exceeded is None or f < exceeded:
+                    exceeded = f
+                continue
+            if cell in table:
+                best, seen = table[cell]
+                if g > best or (g == best and seen == iteration):
+                    continue
+            if cell == goal:
+                found = path + [(action, cell)]
+                bound = g - 1
+                continue
+            if cell not in table and len(table) + len(path) >= capacity:
+                return None
+
+            table[cell] = (g, iteration)
+            path.append((action, cell))
+            self.num_explored += 1
+            self.explored.add(cell)
+            stack.append(children(cell))
+
+        return found, exceeded
+
+
+    def solve_beam(self, heuristic):
+        """
+        Beam search within the memory limit (see beam_search).
+        """
+        self.num_explored = 0
+        self.explored = Bitmap(self.height * self.width)
+        self.beam_search(heuristic, self.search_capacity())
+
+
+    def beam_search(self, heuristic, capacity):
+        """
+        Breadth-first search keeping, of each layer, the nodes closest to
+        the goal by the heuristic that fit in `capacity` entries, along
+        with the paths leading to them. A layer of n nodes holds up to 3n
+        children, so a layer gets a quarter of the entries the paths leave.
+        Until a layer is narrowed, this is a breadth-first search and the
+        path is the shortest; otherwise the reason is recorded in fallback.
+        """
+        goal = self.cell(self.goal)
+        start = Node(state=self.cell(self.start), parent=None, action=None)
+        self.explored.add(start.state)
+        layer = [start]
+        narrowest = None
+
+        # Number of children in the beam, or on the paths to it, of each
+        # node on those paths: a node is dropped when it has none left
+        paths = {}
+
+        while layer:
+            children = {}
+            for node in layer:
+                self.num_explored += 1
+                if node.state == goal:
+                    self.solution = self.backtrack(node)
+                    if narrowest is not None:
+                        self.fallback = f"beam narrowed to {narrowest} nodes, the path may not be the shortest"
+                    return
+                for action, state in self.cell_neighbors(node.state):
+                    if state not in self.explored and state not in children:
+                        children[state] = Node(state=state, parent=node, action=action)
+
+            width = (capacity - len(paths)) // 4
+            if width < 1:
+                raise Exception("no solution found within the memory limit")
+            kept = list(children.values())
+            if len(kept) > width:
+                narrowest = width if narrowest is None else min(narrowest, width)
+                kept = heapq.nsmallest(
+                    width, kept, key=lambda node: heuristic(self.state(node.state), self.goal)
+                )
+            for node in kept:
+                self.explored.add(node.state)
+                paths[node.parent] = paths.get(node.parent, 0) + 1
+
+            # Drop the nodes of the last layer left without children, and
+            # the nodes of their paths left without any either
+            for node in layer:
+                while node not in paths and node.parent is not None:
+                    node = node.parent
+                    paths[node] -= 1
+                    if paths[node]:
+                        break
+                    del paths[node]
+            layer = kept
+
+        if narrowest is not None:
+            raise Exception("no solution found within the memory limit")
+        raise Exception("no solution")
+
+
+    def field(self, state):
+        """
+        Returns the distance field of a (row, col) state, from the field
+        cache or computed and cached.
+        """
+        cell = self.cell(state)
+        field = self.fields.get(cell)
+        if field is None:
+            field = DistanceField.build(self.masks, self.width, cell)
+            self.fields.put(field)
+        return field
+
+
+    def open_cell(self, state):
+        """
+        Returns the cell ID of a (row, col) state, checking it is an open
+        cell inside the maze.
+        """
+        row, col = state
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise Exception(f"{state} is outside the maze")
+        if self.walls[row, col]:
+            raise Exception(f"{state} is a wall")
+        return self.cell(state)
+
+
+    def path(self, start, goal):
+        """
+        Returns the (actions, cells) solution from a start to a goal, given
+        as (row, col) states, without searching: the path is read from the
+        cached distance field of the goal, or of the start backwards, and
+        the field of the goal is computed when neither is cached. Many
+        queries sharing goals are answered in O(path length) each.
+        """
+        start_cell, goal_cell = self.open_cell(start), self.open_cell(goal)
+        if goal_cell not in self.fields and start_cell in self.fields:
+            steps = self.field(start).steps_from(goal_cell, self.width)
+            if steps is None:
+                raise Exception("no solution")
+            cells = [goal_cell] + [cell for _, cell in steps[:-1]]
+            actions = [ACTIONS[OPPOSITE[bit]] for bit, _ in reversed(steps)]
+            return (actions, [self.state(cell) for cell in reversed(cells)])
+
+        steps = self.field(goal).steps_from(start_cell, self.width)
+        if steps is None:
+            raise Exception("no solution")
+        return ([ACTIONS[bit] for bit, _ in steps], [self.state(cell) for _, cell in steps])
+
+
+    def distance(self, start, goal):
+        """
+        Returns the number of steps of the shortest path between two
+        (row, col) states, or None if there is none, from the cached field
+        of either one or a new field of the goal.
+        """
+        start_cell, goal_cell = self.open_cell(start), self.open_cell(goal)
+        if goal_cell not in self.fields and start_cell in self.fields:
+            return self.field(start).distance(goal_cell)
+        return self.field(goal).distance(start_cell)
+
+
+    def backtrack(self, node):
+        """
+        Returns the (actions, cells) solution leading to a goal node, with
+        cells as (row, col) states.
+        """
+        actions = []
+        cells = []
+        while node.parent is not None:
+            actions.append(node.action)
+            cells.append(self.state(node.state))
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=None, cell_border=2):
+        """
+        Draws the maze as a palette image. The color of every cell is picked
+        in one pass over NumPy arrays, then the grid is upscaled to
+        `cell_size` pixels per cell (by default 50, or less if the image
+        would exceed MAX_IMAGE_PIXELS) with `cell_border` black pixels
+        between cells.
+        """
+        from PIL import Image
+        if cell_size is None:
+            fit = math.isqrt(MAX_IMAGE_PIXELS // (self.height * self.width))
+            cell_size = max(1, min(DEFAULT_CELL_SIZE, fit))
+        cell_border = max(0, min(cell_border, (cell_size - 1) // 2))
+
+        # Color of every cell, by palette index, the last assignments taking
+        # precedence as in the drawing order: walls, start, goal, solution,
+        # explored, empty
+        grid = np.full(self.walls.shape, EMPTY, dtype=np.uint8)
+        if self.solution is not None:
+            if show_explored and self.explored is not None:
+                grid[self.explored.to_array(self.walls.shape)] = EXPLORED
+            if show_solution and self.solution[1]:
+                rows, cols = zip(*self.solution[1])
+                grid[rows, cols] = SOLUTION
+        grid[self.goal] = GOAL
+        grid[self.start] = START
+        grid[self.walls] = WALL
+
+        # Upscale with nearest-neighbor indexing, then blacken the borders
+        rows = np.repeat(np.arange(self.height), cell_size)
+        cols = np.repeat(np.arange(self.width), cell_size)
+        pixels = grid[rows[:, None], cols[None, :]]
+        offsets = np.arange(cell_size)
+        border = (offsets < cell_border) | (offsets > cell_size - cell_border)
+        pixels[np.tile(border, self.height), :] = BACKGROUND
+        pixels[:, np.tile(border, self.width)] = BACKGROUND
+
+        img = Image.fromarray(pixels)
+        img.putpalette([value for color in PALETTE for value in color])
+        img.save(filename)
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
 
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+def compare(filename, heuristic="manhattan", memory_limit=SEARCH_MEMORY_BYTES):
+    """
+    Solves a maze with every strategy and prints how they compare.
+    """
+    print(f"{'strategy':<10}{'length':>8}{'explored':>10}{'time ms':>10}")
+    for strategy in STRATEGY_NAMES:
+        m = Maze(filename)
+        m.memory_limit = memory_limit
+        try:
+            m.solve(strategy, heuristic)
+        except Exception as e:
+            print(f"{strategy:<10}  {e}")
+            continue
+        print(f"{strategy:<10}{len(m.solution[0]):>8}{m.num_explored:>10}"
+              f"{m.solve_time * 1000:>10.2f}" + (f"  ({m.fallback})" if m.fallback else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a maze and draw the solution.")
+    parser.add_argument("filename")
+    parser.add_argument("--strategy", choices=STRATEGY_NAMES, default="dfs")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="manhattan",
+                        help="heuristic of the greedy and astar strategies")
+    parser.add_argument("--cell-size", type=int,
+                        help="pixels per cell of maze.png (default 50, less for large mazes)")
+    parser.add_argument("--compare", action="store_true",
+                        help="solve with every strategy and compare them")
+    parser.add_argument("--memory", type=float, metavar="MIB",
+                        default=SEARCH_MEMORY_BYTES / 2 ** 20,
+                        help="memory ceiling of the idastar and beam strategies (default 256)")
+    args = parser.parse_args()
+    memory_limit = int(args.memory * 2 ** 20)
+
+    if args.compare:
+        compare(args.filename, args.heuristic, memory_limit)
+        return
+
+    m = Maze(args.filename)
+    m.memory_limit = memory_limit
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.strategy, args.heuristic)
+    print("States Explored:", m.num_explored)
+    print(f"Time: {m.solve_time * 1000:.2f}ms")
+    if m.fallback:
+        print("Fallback:", m.fallback)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True, cell_size=args.cell_size)
+
+
+if __name__ == "__main__":
+    main()
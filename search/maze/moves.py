@@ -0,0 +1,22 @@
+"""
+Moves of the maze searches.
+
+Every move has a bit in the move mask of a cell, set when the move leads to
+an open cell. Cells are flat IDs (row * width + col), so a move adds the
+same offset to any cell ID of a maze.
+"""
+
+# Bit of each move, in the order neighbors are generated
+UP, DOWN, LEFT, RIGHT = 1 << 0, 1 << 1, 1 << 2, 1 << 3
+MOVES = (("up", UP), ("down", DOWN), ("left", LEFT), ("right", RIGHT))
+ACTIONS = {bit: action for action, bit in MOVES}
+
+# Bit of the opposite move of each move
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+
+def move_steps(width):
+    """
+    Returns the cell ID offset of each move bit in a maze `width` cells wide.
+    """
+    return {UP: -width, DOWN: width, LEFT: -1, RIGHT: 1}